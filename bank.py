@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import mmap
+import struct
+from pathlib import Path
+from random import Random
+from typing import BinaryIO, Iterator
+
+from paths import data_path
+from rules import CELLS, LEVELS
+
+# One file per level: a small header, then every puzzle as 41 bytes of
+# nibble-packed digits. The record count is implied by the file size.
+MAGIC = b"PSBK"
+VERSION = 1
+HEADER = struct.Struct("<4sB3x")
+RECORD_BYTES = (CELLS + 1) // 2
+
+
+def pack(puzzle: str) -> bytes:
+    record = bytearray(RECORD_BYTES)
+    for index, ch in enumerate(puzzle):
+        record[index >> 1] |= int(ch) << (4 * (index & 1))
+    return bytes(record)
+
+
+def unpack(record: bytes) -> str:
+    return "".join(str(record[index >> 1] >> (4 * (index & 1)) & 0xF) for index in range(CELLS))
+
+
+class PuzzleBank:
+    """Graded puzzles on disk, read through mmap.
+
+    Sampling maps the file and decodes the one record it picks, so a bank of
+    millions of puzzles costs nothing to open and no memory to keep.
+    """
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self.directory = directory or data_path("bank")
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, level: str) -> Path:
+        return self.directory / f"{level.lower()}.bin"
+
+    def count(self, level: str) -> int:
+        try:
+            size = self.path(level).stat().st_size
+        except OSError:
+            return 0
+        return max(0, size - HEADER.size) // RECORD_BYTES
+
+    def sample(self, level: str, rng: Random | None = None) -> str | None:
+        count = self.count(level)
+        if not count:
+            return None
+        offset = HEADER.size + (rng or Random()).randrange(count) * RECORD_BYTES
+        with self._map(level) as data:
+            return unpack(data[offset:offset + RECORD_BYTES])
+
+    def puzzles(self, level: str) -> Iterator[str]:
+        count = self.count(level)
+        if not count:
+            return
+        with self._map(level) as data:
+            for offset in range(HEADER.size, HEADER.size + count * RECORD_BYTES, RECORD_BYTES):
+                yield unpack(data[offset:offset + RECORD_BYTES])
+
+    def _map(self, level: str) -> mmap.mmap:
+        with open(self.path(level), "rb") as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            data.close()
+            raise ValueError(f"{self.path(level)} is not a PySudoku puzzle bank")
+        return data
+
+    def writer(self) -> BankWriter:
+        return BankWriter(self)
+
+
+class BankWriter:
+    """Appends puzzles to the bank, opening each level's file on first use."""
+
+    def __init__(self, bank: PuzzleBank) -> None:
+        self.bank = bank
+        self.files: dict[str, BinaryIO] = {}
+
+    def write(self, level: str, puzzle: str) -> None:
+        if level not in LEVELS:
+            raise ValueError(f"unknown level {level!r}, expected one of {LEVELS}")
+        file = self.files.get(level)
+        if file is None:
+            file = self.files[level] = open(self.bank.path(level), "ab")
+            if not file.tell():
+                file.write(HEADER.pack(MAGIC, VERSION))
+        file.write(pack(puzzle))
+
+    def close(self) -> None:
+        for file in self.files.values():
+            file.close()
+        self.files.clear()
+
+    def __enter__(self) -> BankWriter:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
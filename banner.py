@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import os
+from hashlib import sha1
+
+from paths import data_path
+
+
+def banner(text: str, font: str) -> str:
+    """`art.text2art(text, font)`, cached on disk so later starts never import art."""
+    key = sha1(f"{font}\0{text}".encode()).hexdigest()[:16]
+    path = data_path(f"banner-{key}.txt")
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        pass
+    from art import text2art
+
+    rendered = text2art(text, font=font)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(rendered, encoding="utf-8")
+    os.replace(tmp, path)
+    return rendered
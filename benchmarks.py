@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from statistics import median
+from time import perf_counter, process_time
+from typing import Callable
+
+# Well known hard 9x9 puzzles, each with a unique solution.
+HARD_PUZZLES = {
+    "inkala-2012": "800000000003600000070090200050007000000045700000100030001000068008500010090000400",
+    "17-clue": "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+    "platinum-blonde": "000000012000000003002300400001800005060070800000009000008500000900040500470006000",
+    "golden-nugget": "000000039000001005003050800008090006070002000100400000009080050020000600400700000",
+    "easter-monster": "100000002090400050006000700050903000000070000000850040700000600030009080002000001",
+    "ai-escargot": "100007090030020008009600500005300900010080002600004000300000010040000007007000300",
+}
+
+
+def digits_of(puzzle: str) -> list[int]:
+    return [int(ch) for ch in puzzle]
+
+
+# The third-party solver timed alongside ours for scale. It is reported but
+# kept out of the regression gate, which is about this code only.
+REFERENCE = "py-sudoku"
+
+
+def timed(func: Callable[[], object], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        samples.append(perf_counter() - start)
+    return median(samples)
+
+
+def bench_solver(args: argparse.Namespace) -> dict[str, float]:
+    from sudoku import Sudoku
+
+    from pool import decode
+    from solver import BACKENDS, count_solutions, solve
+
+    results = {}
+    for name, puzzle in HARD_PUZZLES.items():
+        digits = digits_of(puzzle)
+        for backend in BACKENDS:
+            results[f"{name}/{backend}/solve"] = timed(lambda: solve(digits, backend), args.repeat)
+            results[f"{name}/{backend}/unique"] = timed(
+                lambda: count_solutions(digits, 2, backend), args.repeat
+            )
+        board = decode(puzzle)
+        results[f"{name}/{REFERENCE}/solve"] = timed(lambda: Sudoku(3, board=board).solve(), args.repeat)
+    return results
+
+
+def bench_generator(args: argparse.Namespace) -> dict[str, float]:
+    from random import Random
+
+    from generator import generate, generate_grid, generate_many
+    from logic import LEVELS
+
+    # Reported as seconds per puzzle; the summary line turns it into puzzles/s.
+    results = {}
+    for level in LEVELS:
+        rng = Random(level)
+        start = perf_counter()
+        for _ in range(args.count):
+            generate(level, rng)
+        results[f"{level}/serial"] = (perf_counter() - start) / args.count
+
+        start = perf_counter()
+        generate_many(level, args.count * args.workers, args.workers, seed=0)
+        results[f"{level}/parallel-{args.workers}"] = (perf_counter() - start) / (args.count * args.workers)
+
+        for box in (4, 5):
+            rng = Random(level)
+            results[f"{level}/{box * box}x{box * box}"] = timed(lambda: generate_grid(level, box, rng), args.repeat)
+    return results
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def bench_keys(args: argparse.Namespace) -> dict[str, float]:
+    import asyncio
+
+    from textual.app import App
+
+    from board import Board
+    from generator import generate_grid
+    from grid import SudokuGrid3X3
+    from linegrid import LineGrid
+
+    # Time spent inside the grid's key handler, separate from the harness
+    # round trip which also waits for the next screen refresh.
+    handled: list[float] = []
+
+    class TimedGrid(SudokuGrid3X3):
+        async def on_key(self, event) -> None:
+            start = perf_counter()
+            await super().on_key(event)
+            handled.append(perf_counter() - start)
+
+    class TimedLineGrid(LineGrid):
+        def on_key(self, event) -> None:
+            start = perf_counter()
+            super().on_key(event)
+            handled.append(perf_counter() - start)
+
+    class KeysApp(App):
+        CSS_PATH = "test.tcss"
+
+        def compose(self):
+            yield TimedGrid()
+
+    class BigKeysApp(App):
+        CSS_PATH = "test.tcss"
+
+        def compose(self):
+            yield TimedLineGrid(Board(generate_grid("Medium", 5)))
+
+    async def press_all(pilot, keys: list[str], name: str, results: dict[str, float]) -> None:
+        handled.clear()
+        # One key at a time: latency from keypress until the app is idle again
+        samples = []
+        for key in keys:
+            start = perf_counter()
+            await pilot.press(key)
+            samples.append(perf_counter() - start)
+        results[f"{name}/handler-p50"] = percentile(handled, 0.5)
+        results[f"{name}/handler-p99"] = percentile(handled, 0.99)
+        results[f"{name}/roundtrip-p50"] = percentile(samples, 0.5)
+        results[f"{name}/roundtrip-p99"] = percentile(samples, 0.99)
+
+    async def run() -> dict[str, float]:
+        results: dict[str, float] = {}
+        app = KeysApp()
+        async with app.run_test() as pilot:
+            grid = app.query_one(TimedGrid)
+            await pilot.click(grid.flat_cells[0])
+            await press_all(pilot, ["right", "down"] * (args.keys // 2), "arrow", results)
+
+            # Held key: a burst of repeats queued back to back. CPU time is
+            # what the app actually burns; wall time includes refresh pacing.
+            start, cpu = perf_counter(), process_time()
+            await pilot.press(*["right"] * args.keys)
+            results["arrow/held-per-key"] = (perf_counter() - start) / args.keys
+            results["arrow/held-cpu-per-key"] = (process_time() - cpu) / args.keys
+
+            empty = next(cell for cell in grid.flat_cells if not grid.board.givens[cell.index])
+            await pilot.click(empty)
+            digits = [str(digit) for digit in range(1, 10)] + ["backspace"]
+            await press_all(pilot, digits * (args.keys // len(digits)), "digit", results)
+
+        # The same on a 25x25 board, where one widget draws all 625 cells
+        app = BigKeysApp()
+        async with app.run_test(size=(120, 50)) as pilot:
+            grid = app.query_one(TimedLineGrid)
+            grid.focus()
+            grid.select(next(index for index in range(625) if not grid.board.givens[index]))
+            await press_all(pilot, ["right", "down"] * (args.keys // 2), "25x25-arrow", results)
+            grid.select(next(index for index in range(625) if not grid.board.givens[index]))
+            digits = ["1", "2", "7", "backspace"]
+            await press_all(pilot, digits * (args.keys // len(digits)), "25x25-digit", results)
+        return results
+
+    return asyncio.run(run())
+
+
+# Runs in a fresh interpreter so imports are cold too.
+COLD_START = """
+import asyncio, sys, time
+start = time.perf_counter()
+app = getattr(__import__(sys.argv[1]), sys.argv[2])()
+async def run():
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        print(time.perf_counter() - start)
+asyncio.run(run())
+"""
+
+
+def bench_app(args: argparse.Namespace) -> dict[str, float]:
+    import asyncio
+    import subprocess
+    import tracemalloc
+
+    from textual.app import App
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    results: dict[str, float] = {}
+    for module, app_class in (("grid", "MyApp"), ("main", "Main")):
+        samples = [
+            float(subprocess.run(
+                [sys.executable, "-c", COLD_START, module, app_class],
+                cwd=here, capture_output=True, text=True, check=True,
+            ).stdout.split()[-1])
+            for _ in range(args.repeat)
+        ]
+        results[f"cold-start/{app_class}"] = median(samples)
+
+    from main import Main
+    from grid import MyApp, SudokuGrid3X3
+
+    pool_stats: dict[str, float] = {}
+
+    async def start_game() -> float:
+        app = Main()
+        async with app.run_test(size=(120, 50)) as pilot:
+            # Measure the steady state: a pool that already holds a puzzle
+            while not app.pool.queues["Medium"].qsize():
+                await asyncio.sleep(0.05)
+            await pilot.pause()
+            await pilot.click("#new-game")
+            while not app.query("#start-game"):
+                await pilot.pause()
+            start = perf_counter()
+            await pilot.click("#start-game")
+            while not app.query(SudokuGrid3X3):
+                await pilot.pause()
+            await pilot.pause()
+            elapsed = perf_counter() - start
+            for name in ("misses", "time_to_first_board"):
+                pool_stats[name] = pool_stats.get(name, 0) + app.pool.stats[name]
+            return elapsed
+
+    results["start-game/interactive"] = median(asyncio.run(start_game()) for _ in range(args.repeat))
+    # Misses count over all the runs; every run should have been a hit
+    results["pool/misses-count"] = pool_stats["misses"]
+    results["pool/time-to-first-board"] = pool_stats["time_to_first_board"] / args.repeat
+
+    class EmptyApp(App):
+        CSS_PATH = "test.tcss"
+
+    async def mounted_bytes(app: App) -> int:
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            async with app.run_test() as pilot:
+                await pilot.pause()
+                return tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+
+    grid_bytes = asyncio.run(mounted_bytes(MyApp())) - asyncio.run(mounted_bytes(EmptyApp()))
+    results["memory/grid-bytes"] = grid_bytes
+    results["memory/per-cell-bytes"] = grid_bytes / 81
+    return results
+
+
+def bench_replay(args: argparse.Namespace) -> dict[str, float]:
+    import asyncio
+    from pathlib import Path
+    from random import Random
+
+    from textual.app import App
+
+    from board import Board
+    from generator import generate
+    from grid import SudokuGrid3X3
+    from replay import DIGIT, SELECT, Replay, synthetic, unpack
+    from solver import solve
+
+    # Recorded games are benchmark input as they are; a scripted game stands in without any
+    if args.replay:
+        replays = [Replay.load(Path(path)) for path in args.replay]
+    else:
+        puzzle = generate("Medium", Random(0))
+        replays = [synthetic(puzzle, solve(digits_of(puzzle)))]
+
+    results: dict[str, float] = {}
+    rng = Random(0)
+    seeks = []
+    for replay in replays:
+        for _ in range(args.keys):
+            ms = rng.uniform(0, replay.duration)
+            start = perf_counter()
+            replay.seek(ms)
+            seeks.append(perf_counter() - start)
+    results["seek-p50"] = percentile(seeks, 0.5)
+    results["seek-p99"] = percentile(seeks, 0.99)
+
+    class ReplayApp(App):
+        CSS_PATH = "test.tcss"
+
+        def __init__(self, replay: Replay) -> None:
+            super().__init__()
+            self.replay = replay
+
+        def compose(self):
+            yield SudokuGrid3X3(board=Board(self.replay.start, self.replay.givens))
+
+    async def drive(replay: Replay, handled: list[float], samples: list[float]) -> None:
+        # Every selection and digit entry goes through the grid the way the player made it
+        app = ReplayApp(replay)
+        async with app.run_test(size=(120, 50)) as pilot:
+            grid = app.query_one(SudokuGrid3X3)
+            for event in replay.events:
+                kind, cell, digit = unpack(event)
+                if kind == DIGIT and grid.selected_cell is not grid.flat_cells[cell]:
+                    # Placed by the auto-solver, which does not always move the selection
+                    grid.select_cell(grid.flat_cells[cell])
+                start = perf_counter()
+                if kind == SELECT:
+                    grid.select_cell(grid.flat_cells[cell])
+                elif kind == DIGIT:
+                    grid.place_digit(digit)
+                else:
+                    continue
+                handled.append(perf_counter() - start)
+                await pilot.pause()
+                samples.append(perf_counter() - start)
+            if bytes(grid.board.digits) != replay.frame(len(replay)).digits:
+                raise RuntimeError("the grid did not end up where the recorded game did")
+
+    handled: list[float] = []
+    samples: list[float] = []
+    for replay in replays:
+        asyncio.run(drive(replay, handled, samples))
+    results["event/handler-p50"] = percentile(handled, 0.5)
+    results["event/handler-p99"] = percentile(handled, 0.99)
+    results["event/roundtrip-p50"] = percentile(samples, 0.5)
+    results["event/roundtrip-p99"] = percentile(samples, 0.99)
+    return results
+
+
+SUITES: dict[str, Callable[[argparse.Namespace], dict[str, float]]] = {
+    "solver": bench_solver,
+    "generator": bench_generator,
+    "keys": bench_keys,
+    "app": bench_app,
+    "replay": bench_replay,
+}
+
+
+def report(name: str, value: float) -> str:
+    if name.endswith("-bytes"):
+        return f"{name:<45} {value / 1024:10.1f} KiB"
+    if name.endswith("-count"):
+        return f"{name:<45} {value:10.0f}"
+    return f"{name:<45} {value * 1000:10.2f} ms  {1 / value if value else 0:10.1f} /s"
+
+
+def regressions(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    # Every metric is a cost (time, bytes or misses), so only growth counts.
+    return [
+        f"{name}: {baseline[name]:.6g} -> {value:.6g} (+{(value / baseline[name] - 1) * 100:.0f}%)"
+        for name, value in results.items()
+        if f"/{REFERENCE}/" not in name
+        and baseline.get(name) and value > baseline[name] * (1 + threshold)
+    ]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="PySudoku benchmarks")
+    parser.add_argument("suites", nargs="*", metavar="suite", help=f"any of {', '.join(SUITES)} (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the median is kept")
+    parser.add_argument("--count", type=int, default=10, help="puzzles generated per level and worker")
+    parser.add_argument("--keys", type=int, default=200, help="key presses per kind for the keys suite")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for parallel generation")
+    parser.add_argument("--replay", action="append", metavar="FILE", help="recorded game for the replay suite, repeatable")
+    parser.add_argument("--json", metavar="PATH", help="write the results to this JSON file")
+    parser.add_argument("--baseline", metavar="PATH", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown over the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    for suite in args.suites:
+        if suite not in SUITES:
+            parser.error(f"unknown suite {suite!r}")
+
+    # Never let a benchmark touch the player's pool, saves or leader board
+    os.environ.setdefault("PYSUDOKU_HOME", tempfile.mkdtemp(prefix="pysudoku-bench-"))
+
+    results: dict[str, float] = {}
+    for suite in args.suites or SUITES:
+        print(f"== {suite}")
+        for name, value in SUITES[suite](args).items():
+            results[f"{suite}/{name}"] = value
+            print(report(name, value))
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as file:
+            failed = regressions(results, json.load(file), args.threshold)
+        if failed:
+            print(f"== regressions over {args.threshold:.0%}")
+            print("\n".join(failed))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
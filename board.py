@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Iterable, NamedTuple
+
+# Static geometry of an n²×n² grid with n×n boxes, computed once per box size.
+# Cells are indexed row-major; units 0..size-1 are rows, then columns, then
+# boxes.
+MAX_BOX = 5
+
+
+class Geometry(NamedTuple):
+    box: int
+    size: int
+    cells: int
+    row_of: tuple[int, ...]
+    col_of: tuple[int, ...]
+    box_of: tuple[int, ...]
+    cell_units: tuple[tuple[int, int, int], ...]
+    units: tuple[tuple[int, ...], ...]
+    peers: tuple[tuple[int, ...], ...]
+    peer_sets: tuple[frozenset[int], ...]
+    full: int
+
+
+@lru_cache(maxsize=None)
+def geometry(box: int) -> Geometry:
+    if not 2 <= box <= MAX_BOX:
+        raise ValueError(f"box size must be between 2 and {MAX_BOX}, not {box}")
+    size = box * box
+    cells = size * size
+    row_of = tuple(index // size for index in range(cells))
+    col_of = tuple(index % size for index in range(cells))
+    box_of = tuple(row_of[index] // box * box + col_of[index] // box for index in range(cells))
+    cell_units = tuple(
+        (row_of[index], size + col_of[index], 2 * size + box_of[index])
+        for index in range(cells)
+    )
+    members: list[list[int]] = [[] for _ in range(3 * size)]
+    for index, units in enumerate(cell_units):
+        for unit in units:
+            members[unit].append(index)
+    units = tuple(map(tuple, members))
+    peers = tuple(
+        tuple(sorted({peer for unit in cell_units[index] for peer in units[unit]} - {index}))
+        for index in range(cells)
+    )
+    return Geometry(
+        box, size, cells, row_of, col_of, box_of, cell_units, units, peers,
+        tuple(frozenset(cell_peers) for cell_peers in peers), (1 << size) - 1,
+    )
+
+
+def geometry_for(cells: int) -> Geometry:
+    box = round(cells ** 0.25)
+    if box ** 4 != cells:
+        raise ValueError(f"{cells} cells is not a square grid of square boxes")
+    return geometry(box)
+
+
+# The standard 9x9 grid, which most of the game is written against.
+STANDARD = geometry(3)
+SIZE = STANDARD.size
+CELLS = STANDARD.cells
+ROW_OF = STANDARD.row_of
+COL_OF = STANDARD.col_of
+BOX_OF = STANDARD.box_of
+CELL_UNITS = STANDARD.cell_units
+UNITS = STANDARD.units
+PEERS = STANDARD.peers
+PEER_SETS = STANDARD.peer_sets
+FULL = STANDARD.full
+
+
+def flatten(rows: Iterable[Iterable[int | None]]) -> list[int]:
+    return [digit or 0 for row in rows for digit in row]
+
+
+class Board:
+    """The game state behind the grid widgets.
+
+    Digits live in a flat bytearray and every unit keeps a count per digit,
+    so whether a cell is in conflict is three table lookups. `place` returns
+    the cells whose error state flipped; nothing else needs repainting.
+
+    Each unit also keeps a mask of the digits it holds, from which the
+    candidates of a cell and its peers are refreshed on every placement.
+    `notes` are the player's pencil marks, pruned the same way.
+
+    The grid size follows from the number of digits: 81 for 9x9, 256 for
+    16x16, 625 for 25x25.
+    """
+
+    __slots__ = (
+        "geometry", "stride", "digits", "givens", "counts", "errors", "conflicts",
+        "masks", "candidates", "notes",
+    )
+
+    def __init__(self, digits: Iterable[int], givens: Iterable[int] | None = None) -> None:
+        self.digits = bytearray(digits)
+        self.geometry = geometry = geometry_for(len(self.digits))
+        # Without an explicit mask every filled cell counts as a given
+        self.givens = bytes(givens) if givens is not None else bytes(1 if digit else 0 for digit in self.digits)
+        self.stride = geometry.size + 1
+        self.counts = bytearray(3 * geometry.size * self.stride)
+        self.errors = bytearray(geometry.cells)
+        self.masks = [0] * (3 * geometry.size)
+        self.notes = [0] * geometry.cells
+        for index, digit in enumerate(self.digits):
+            if digit:
+                for unit in geometry.cell_units[index]:
+                    self.counts[unit * self.stride + digit] += 1
+                    self.masks[unit] |= 1 << (digit - 1)
+        self.candidates = [self.candidates_of(index) for index in range(geometry.cells)]
+        for index in range(geometry.cells):
+            self.errors[index] = self.in_conflict(index)
+        self.conflicts = sum(self.errors)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Iterable[int | None]]) -> Board:
+        return cls(flatten(rows))
+
+    def in_conflict(self, index: int) -> bool:
+        digit = self.digits[index]
+        if not digit:
+            return False
+        counts, stride = self.counts, self.stride
+        return any(counts[unit * stride + digit] > 1 for unit in self.geometry.cell_units[index])
+
+    def candidates_of(self, index: int) -> int:
+        if self.digits[index]:
+            return 0
+        row, col, box = self.geometry.cell_units[index]
+        masks = self.masks
+        return self.geometry.full & ~(masks[row] | masks[col] | masks[box])
+
+    def place(self, index: int, digit: int) -> list[int]:
+        if self.givens[index]:
+            raise ValueError(f"cell {index} is a given and cannot be changed")
+        old = self.digits[index]
+        if old == digit:
+            return []
+        counts, stride = self.counts, self.stride
+        masks = self.masks
+        peers = self.geometry.peers[index]
+        for unit in self.geometry.cell_units[index]:
+            if old:
+                counts[unit * stride + old] -= 1
+                if not counts[unit * stride + old]:
+                    masks[unit] &= ~(1 << (old - 1))
+            if digit:
+                counts[unit * stride + digit] += 1
+                masks[unit] |= 1 << (digit - 1)
+        self.digits[index] = digit
+        self.candidates[index] = self.candidates_of(index)
+        for peer in peers:
+            self.candidates[peer] = self.candidates_of(peer)
+
+        # Only the cell itself and peers holding the old or new digit can flip,
+        # which covers plain sets, overwrites and erasures alike.
+        changed = []
+        errors = self.errors
+        for cell in (index, *peers):
+            if cell != index and self.digits[cell] not in (old, digit):
+                continue
+            error = self.in_conflict(cell)
+            if error != errors[cell]:
+                errors[cell] = error
+                self.conflicts += 1 if error else -1
+                changed.append(cell)
+        return changed
+
+    def toggle_note(self, index: int, digit: int) -> int:
+        self.notes[index] ^= 1 << (digit - 1)
+        return self.notes[index]
+
+    def prune_notes(self, index: int) -> list[int]:
+        """Drop the digit at `index` from its peers' notes, returning the peers touched."""
+        bit = 1 << (self.digits[index] - 1)
+        touched = [peer for peer in self.geometry.peers[index] if self.notes[peer] & bit]
+        for peer in touched:
+            self.notes[peer] &= ~bit
+        return touched
+
+    def is_solved(self) -> bool:
+        return not self.conflicts and all(self.digits)
+
+
+def find_conflicts(digits: Iterable[int]) -> set[int]:
+    # Brute-force reference used to cross-check Board's incremental bookkeeping.
+    digits = list(digits)
+    peers = geometry_for(len(digits)).peers
+    return {
+        index
+        for index, digit in enumerate(digits)
+        if digit and any(digits[peer] == digit for peer in peers[index])
+    }
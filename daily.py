@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import CancelledError, Future
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable
+
+from paths import data_path
+from rules import LEVELS
+
+# Days past today that are generated ahead of time.
+DAYS_AHEAD = 7
+
+
+def level_of(day: date) -> str:
+    # The week gets harder: Easy early on, Hard over the weekend
+    return LEVELS[day.weekday() * len(LEVELS) // 7]
+
+
+def puzzle_for(day: date) -> str:
+    """The daily puzzle of `day`, seeded by the date so every player gets the same one."""
+    from generator import seeded
+
+    return seeded(level_of(day), f"daily/{day.isoformat()}")
+
+
+class DailyPuzzles:
+    """Today's puzzle and the next DAYS_AHEAD, cached on disk.
+
+    `precompute` hands the missing days to a worker process, so opening
+    today's puzzle is a dictionary lookup; `fetch` waits for a day that has
+    not landed yet. Days in the past are dropped whenever the cache is saved.
+    """
+
+    def __init__(self, path: Path | None = None, days: int = DAYS_AHEAD) -> None:
+        self.path = path or data_path("daily.json")
+        self.days = days
+        self._lock = threading.Lock()
+        # Days handed to the worker and not landed yet
+        self._pending: dict[date, Future] = {}
+        try:
+            self.puzzles: dict[str, str] = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.puzzles = {}
+
+    def get(self, day: date | None = None) -> tuple[date, str, str | None]:
+        """The day, its level and its puzzle, None if it is not generated yet."""
+        day = day or date.today()
+        with self._lock:
+            puzzle = self.puzzles.get(day.isoformat())
+        return day, level_of(day), puzzle
+
+    def fetch(self, submit: Callable[..., Future], day: date) -> str:
+        """Wait for the puzzle of `day`, joining its precompute job if there is one.
+
+        This blocks, so it is for worker threads; if the worker process is
+        gone the puzzle is generated right here.
+        """
+        try:
+            return self._submit(submit, day).result()
+        except (CancelledError, RuntimeError):
+            puzzle = puzzle_for(day)
+            self._store(day, puzzle)
+            return puzzle
+
+    def missing(self, today: date | None = None) -> list[date]:
+        today = today or date.today()
+        days = [today + timedelta(days=offset) for offset in range(self.days + 1)]
+        with self._lock:
+            return [day for day in days if day.isoformat() not in self.puzzles]
+
+    def precompute(self, submit: Callable[..., Future], today: date | None = None) -> None:
+        """Generate every missing day through `submit`, storing each as it lands.
+
+        Days are submitted one after another rather than all at once, so they
+        never queue up in front of other work sharing the worker.
+        """
+        self._chain(submit, self.missing(today))
+
+    def _chain(self, submit: Callable[..., Future], days: list[date]) -> None:
+        if not days:
+            return
+        try:
+            future = self._submit(submit, days[0])
+        except RuntimeError:
+            # The worker was shut down
+            return
+        future.add_done_callback(lambda future: self._chain(submit, days[1:]))
+
+    def _submit(self, submit: Callable[..., Future], day: date) -> Future:
+        with self._lock:
+            future = self._pending.get(day)
+            if future is not None:
+                return future
+            future = self._pending[day] = submit(puzzle_for, day)
+        # Outside the lock: a future that is already done calls back at once
+        future.add_done_callback(lambda future: self._landed(day, future))
+        return future
+
+    def _landed(self, day: date, future: Future) -> None:
+        with self._lock:
+            self._pending.pop(day, None)
+        if not future.cancelled() and future.exception() is None:
+            self._store(day, future.result())
+
+    def _store(self, day: date, puzzle: str) -> None:
+        today = date.today().isoformat()
+        with self._lock:
+            self.puzzles[day.isoformat()] = puzzle
+            self.puzzles = {key: value for key, value in self.puzzles.items() if key >= today}
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.puzzles, sort_keys=True))
+            os.replace(tmp, self.path)
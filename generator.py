@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from random import Random
+
+from board import CELLS, SIZE, UNITS, geometry
+from logic import LEVELS, grade
+from solver import is_unique, solve
+
+# Clue floor while carving; easier levels stop early instead of going minimal.
+MIN_CLUES = {"Easy": 36, "Medium": 26, "Hard": 17}
+# The same floor as a share of the cells, for the bigger grids.
+MIN_CLUE_SHARE = {"Easy": 0.55, "Medium": 0.45, "Hard": 0.0}
+
+
+class SeededRandom(Random):
+    """A Random whose shuffles and samples draw on random() alone.
+
+    For a given seed Python keeps random() identical across versions and
+    platforms, but not the integer helpers built on top of it, so seeded
+    puzzles avoid those to come out the same on every machine.
+    """
+
+    def _below(self, n: int) -> int:
+        return int(self.random() * n)
+
+    def randrange(self, start: int, stop: int | None = None) -> int:
+        if stop is None:
+            start, stop = 0, start
+        return start + self._below(stop - start)
+
+    def shuffle(self, items: list) -> None:
+        for i in reversed(range(1, len(items))):
+            j = self._below(i + 1)
+            items[i], items[j] = items[j], items[i]
+
+    def sample(self, population, k: int) -> list:
+        pool = list(population)
+        for i in range(k):
+            j = i + self._below(len(pool) - i)
+            pool[i], pool[j] = pool[j], pool[i]
+        return pool[:k]
+
+
+def random_solution(rng: Random) -> bytearray:
+    # The three diagonal boxes never constrain each other, so fill them freely
+    # and let the solver complete the grid.
+    digits = bytearray(CELLS)
+    for box in (2 * SIZE, 2 * SIZE + 4, 2 * SIZE + 8):
+        values = list(range(1, SIZE + 1))
+        rng.shuffle(values)
+        for index, digit in zip(UNITS[box], values):
+            digits[index] = digit
+    return bytearray(solve(digits))
+
+
+def carve(solution: bytes, rng: Random, min_clues: int) -> bytearray:
+    """Blank cells in symmetric pairs for as long as the solution stays unique."""
+    puzzle = bytearray(solution)
+    order = list(range(CELLS // 2 + 1))
+    rng.shuffle(order)
+    clues = CELLS
+    for index in order:
+        pair = {index, CELLS - 1 - index}
+        if clues - len(pair) < min_clues:
+            continue
+        for cell in pair:
+            puzzle[cell] = 0
+        if is_unique(puzzle):
+            clues -= len(pair)
+        else:
+            for cell in pair:
+                puzzle[cell] = solution[cell]
+    return puzzle
+
+
+def generate(level: str, rng: Random | None = None) -> str:
+    if level not in LEVELS:
+        raise ValueError(f"unknown level {level!r}, expected one of {LEVELS}")
+    rng = rng or Random()
+    while True:
+        puzzle = carve(random_solution(rng), rng, MIN_CLUES[level])
+        if grade(puzzle)[0] == level:
+            return "".join(map(str, puzzle))
+
+
+def seeded(level: str, seed: str | int) -> str:
+    """The puzzle for `seed`: the same one every time, on every machine."""
+    return generate(level, SeededRandom(f"{level}/{seed}"))
+
+
+def pattern_solution(box: int, rng: Random) -> bytearray:
+    """A random valid grid of any box size, without search.
+
+    Starts from the shifted-rows pattern and shuffles rows within bands,
+    bands, columns within stacks, stacks and the digits, none of which can
+    break the rules.
+    """
+    size = box * box
+    bands = rng.sample(range(box), box)
+    rows = [band * box + row for band in bands for row in rng.sample(range(box), box)]
+    stacks = rng.sample(range(box), box)
+    cols = [stack * box + col for stack in stacks for col in rng.sample(range(box), box)]
+    digits = rng.sample(range(1, size + 1), size)
+    return bytearray(
+        digits[(box * (row % box) + row // box + col) % size]
+        for row in rows for col in cols
+    )
+
+
+def carve_singles(solution: bytes, rng: Random, box: int, min_clues: int, hidden: bool) -> bytearray:
+    """Blank cells whose digit is still forced by a single at the moment it is blanked.
+
+    Filling the blanks back in reverse order replays exactly those states, so
+    the puzzle has one solution and singles alone reach it. Every check is a
+    few mask operations, which keeps 25x25 carving interactive where a
+    uniqueness search per blank is not.
+    """
+    shape = geometry(box)
+    puzzle = bytearray(solution)
+    masks = [0] * (3 * shape.size)
+    for index, digit in enumerate(puzzle):
+        for unit in shape.cell_units[index]:
+            masks[unit] |= 1 << (digit - 1)
+
+    def excluded(index: int, bit: int) -> bool:
+        return bool(puzzle[index]) or any(masks[unit] & bit for unit in shape.cell_units[index])
+
+    clues = shape.cells
+    order = list(range(shape.cells))
+    rng.shuffle(order)
+    for index in order:
+        if clues <= min_clues:
+            break
+        digit = puzzle[index]
+        bit = 1 << (digit - 1)
+        units = shape.cell_units[index]
+        for unit in units:
+            masks[unit] &= ~bit
+        puzzle[index] = 0
+        # Naked single: the peers hold every other digit
+        forced = (masks[units[0]] | masks[units[1]] | masks[units[2]]) == shape.full & ~bit
+        if not forced and hidden:
+            # Hidden single: no other empty cell of some unit can take the digit
+            forced = any(
+                all(cell == index or excluded(cell, bit) for cell in shape.units[unit])
+                for unit in units
+            )
+        if forced:
+            clues -= 1
+        else:
+            puzzle[index] = digit
+            for unit in units:
+                masks[unit] |= bit
+    return puzzle
+
+
+def generate_grid(level: str, box: int, rng: Random | None = None) -> bytearray:
+    """A puzzle for any box size, carved with singles only.
+
+    Easy uses naked singles and keeps more clues; Medium adds hidden singles
+    and carves as deep as they allow. Hard then tries to blank `size` more
+    clues, keeping each one the solver proves does not break uniqueness.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"unknown level {level!r}, expected one of {LEVELS}")
+    rng = rng or Random()
+    shape = geometry(box)
+    puzzle = carve_singles(
+        pattern_solution(box, rng), rng, box, int(shape.cells * MIN_CLUE_SHARE[level]), level != "Easy"
+    )
+    if level == "Hard":
+        clues = [index for index in range(shape.cells) if puzzle[index]]
+        for index in rng.sample(clues, shape.size):
+            digit, puzzle[index] = puzzle[index], 0
+            if not is_unique(puzzle):
+                puzzle[index] = digit
+    return puzzle
+
+
+def _generate_batch(level: str, count: int, seed: int) -> list[str]:
+    rng = Random(seed)
+    return [generate(level, rng) for _ in range(count)]
+
+
+def generate_many(level: str, count: int, workers: int | None = None, seed: int | None = None) -> list[str]:
+    """Generate `count` puzzles of one level spread across worker processes."""
+    rng = Random(seed)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers, mp_context=get_context("spawn")) as executor:
+        sizes = [count // workers + (worker < count % workers) for worker in range(workers)]
+        batches = [
+            executor.submit(_generate_batch, level, size, rng.randrange(2**63))
+            for size in sizes if size
+        ]
+        return [puzzle for batch in batches for puzzle in batch.result()]
@@ -0,0 +1,582 @@
+from __future__ import annotations
+
+from textual.containers import Grid
+from textual.widgets import Static
+from textual.message import Message
+from textual.reactive import var
+from textual.app import ComposeResult, App
+from textual import work
+from textual.worker import get_current_worker
+from textual.events import Key
+from textual.timer import Timer
+
+from itertools import chain
+from queue import Empty, Full, Queue
+from time import monotonic
+
+from board import Board, PEER_SETS, SIZE
+from history import History
+from logic import Trace, apply, next_step, walkthrough
+from solver import is_solvable
+from generator import generate
+from pool import DEFAULT_DIFFICULTY, decode
+from replay import DIGIT, SELECT, Recorder
+
+class Cell(Static):
+
+    DEFAULT_CSS = """
+        Cell {
+            height: 1;
+            width: 3;
+            text-align: center;
+            color: #0F0;
+
+            &.selected {
+                background: $surface-lighten-3; 
+            }
+
+            &.neighbour {
+                background: $success-lighten-3 10%; 
+            }
+
+            &.built-in {
+                color: white 50%;
+                text-style: italic;
+            }
+            &.error {
+                color: red;
+            }
+        }
+
+    """
+
+    class Clicked(Message):
+        def __init__(self, cell):
+            self.cell = cell
+            super().__init__()
+
+    selected: var[bool] = var(False, init=False)
+    digit: var[int] = var(0, init=False)
+    notes: var[int] = var(0, init=False)
+
+    SUPERSCRIPTS = "⁰¹²³⁴⁵⁶⁷⁸⁹"
+
+    def __init__(self, digit: int | None, row_index: int, col_index: int, given: bool | None = None) -> None:
+        super().__init__()
+        self.row: int = row_index
+        self.col: int = col_index
+        self.index: int = row_index * SIZE + col_index
+        self.digit = digit
+        if self.digit if given is None else given:
+            self.add_class('built-in')
+
+    def on_click(self) -> None:
+        self.post_message(self.Clicked(self))
+
+    def watch_digit(self):
+        self.render_value()
+
+    def watch_notes(self):
+        self.render_value()
+
+    def render_value(self) -> None:
+        if self.digit:
+            self.update(str(self.digit))
+        elif self.notes:
+            # Three columns fit three pencil marks; a cell with more shows how
+            # many it has, and the grid lists them all while it is selected
+            marks = [self.SUPERSCRIPTS[digit] for digit in range(1, 10) if self.notes >> (digit - 1) & 1]
+            if len(marks) > 3:
+                marks = ['⁽', self.SUPERSCRIPTS[len(marks)], '⁾']
+            self.update(f"[dim]{''.join(marks)}[/]")
+        else:
+            self.update('')
+
+    def watch_selected(self):
+        # self.app.notify(str(self.selected))
+        # Styles are refreshed by the grid in one batch per selection change
+        self.set_class(self.selected, 'selected', update=False)
+
+    def __str__(self):
+        return f"({self.row}, {self.col})"
+
+class SudokuGrid3X3(Grid, can_focus=True):
+
+    DEFAULT_CSS = """
+        SudokuGrid3X3 {
+            box-sizing: content-box;
+            grid-size: 9;
+            width: 40;
+            height: 23;
+            padding-top: 2;
+            padding-left: 1;
+            keyline: thin $success-darken-3;
+            background: $success-lighten-3 15%;
+            grid-gutter: 0 1;
+        }
+
+        SudokuGrid3X3:focus {
+            border: vkey green;
+        }
+
+    """
+
+    HISTORY_KEYS = {
+        'ctrl+z': 'undo',
+        'ctrl+y': 'redo',
+        'ctrl+b': 'undo_to_clean',
+    }
+
+    TOOL_KEYS = {
+        'n': 'toggle_notes_mode',
+        'h': 'show_hint',
+    }
+
+    SOLVE_KEYS = {
+        'a': 'toggle_autosolve',
+        's': 'solve_step',
+        'escape': 'stop_solving',
+        'plus': 'solve_faster',
+        'minus': 'solve_slower',
+    }
+
+    # Solver steps shown per second, and how far the solver may run ahead
+    SOLVE_FPS = 20
+    SOLVE_QUEUE = 256
+
+    class Moved(Message):
+        def __init__(self, index: int, digit: int) -> None:
+            self.index = index
+            self.digit = digit
+            super().__init__()
+
+    class Solved(Message):
+        def __init__(self, assisted: bool = False) -> None:
+            # Set when the solver finished the puzzle for the player
+            self.assisted = assisted
+            super().__init__()
+
+    class NotesChanged(Message):
+        def __init__(self, index: int, notes: int) -> None:
+            self.index = index
+            self.notes = notes
+            super().__init__()
+
+    def __init__(self, puzzle: list[list[int | None]] | None = None, board: Board | None = None) -> None:
+        # Puzzles normally come pre-generated from the PuzzlePool, or as a
+        # whole Board when resuming a saved game
+        if board is None:
+            board = Board.from_rows(puzzle or decode(generate(DEFAULT_DIFFICULTY)))
+        self.board = board
+        self.history = History(not board.conflicts)
+        self.solvable = True
+        self.finished = False
+        self.notes_mode = False
+        self.solve_fps = self.SOLVE_FPS
+        self.solve_steps: Queue[Trace | None] | None = None
+        self.solve_timer: Timer | None = None
+        self.autoplay = False
+        self.step_credit = 0
+        # Set by the app to record the game; written to in step with the board
+        # so every keyframe matches the events before it
+        self.recorder: Recorder | None = None
+        super().__init__()
+
+    def compose(self) -> ComposeResult:
+        self.cells = [
+            [
+                Cell(self.board.digits[row_in * SIZE + col_in] or None, row_in, col_in,
+                     bool(self.board.givens[row_in * SIZE + col_in]))
+                for col_in in range(SIZE)
+            ]
+            for row_in in range(SIZE)
+            # [Cell(str((row * 9 + col) % 10), row, col) for col in range(9)]
+            # for row in range(9)
+        ]
+        self.flat_cells = [cell for row in self.cells for cell in row]
+        for cell in self.flat_cells:
+            cell.set_class(bool(self.board.errors[cell.index]), 'error')
+            if self.board.notes[cell.index]:
+                cell.notes = self.board.notes[cell.index]
+        yield from self.flat_cells
+
+    # def on_blur(self) -> None:
+    #     if self.selected_cell:
+    #         self.selected_cell.selected = False
+    #         self.selected_cell = None
+
+    def on_mount(self) -> None:
+        # To track the currently selected cell
+        self.selected_cell = None
+        # Indices of the cells currently painted as neighbours
+        self.highlighted: frozenset[int] = frozenset()
+
+    def select_cell(self, cell) -> None:
+        changed = [cell]
+        if self.selected_cell is not None and self.selected_cell is not cell:
+            self.selected_cell.selected = False
+            changed.append(self.selected_cell)
+        cell.selected = True
+        self.selected_cell = cell
+        changed += self.select_neighbours()
+        self.show_notes()
+        if self.recorder is not None:
+            self.recorder.record(SELECT, cell.index)
+
+        # Classes were flipped without touching styles; restyle every changed
+        # cell in one pass (they share a rule cache) and repaint once.
+        with self.app.batch_update():
+            self.app.stylesheet.update_nodes(changed)
+
+    def clear_selection(self) -> None:
+        if self.selected_cell is None:
+            return
+        changed = [self.selected_cell]
+        self.selected_cell.selected = False
+        self.selected_cell = None
+        self.show_notes()
+        for index in self.highlighted:
+            cell = self.flat_cells[index]
+            cell.remove_class('neighbour', update=False)
+            changed.append(cell)
+        self.highlighted = frozenset()
+        with self.app.batch_update():
+            self.app.stylesheet.update_nodes(changed)
+
+    def select_neighbours(self) -> list[Cell]:
+        current = PEER_SETS[self.selected_cell.index]
+        changed = []
+
+        # Remove the class from cells that are no longer neighbors
+        for index in self.highlighted - current:
+            cell = self.flat_cells[index]
+            cell.remove_class('neighbour', update=False)
+            changed.append(cell)
+
+        # Add the class to new neighbor cells
+        for index in current - self.highlighted:
+            cell = self.flat_cells[index]
+            cell.add_class('neighbour', update=False)
+            changed.append(cell)
+
+        self.highlighted = current
+        return changed
+
+    def place_digit(self, digit: int) -> None:
+        self.stop_solving()
+        index = self.selected_cell.index
+        old = self.board.digits[index]
+        if old == digit:
+            return
+        self.apply_move(index, digit)
+        self.history.push(index, old, digit, not self.board.conflicts)
+        self.after_move()
+
+    def apply_move(self, index: int, digit: int, prune: bool = True) -> None:
+        changed = self.board.place(index, digit)
+        if self.recorder is not None:
+            self.recorder.record(DIGIT, index, digit)
+        self.flat_cells[index].digit = digit or None
+        self.show_notes(index)
+        self.post_message(self.Moved(index, digit))
+        # The board reports exactly which cells flipped in or out of conflict
+        for cell in changed:
+            self.flat_cells[cell].set_class(bool(self.board.errors[cell]), 'error')
+        if digit and prune:
+            for peer in self.board.prune_notes(index):
+                self.update_notes(peer)
+
+    def toggle_note(self, digit: int) -> None:
+        index = self.selected_cell.index
+        if self.board.digits[index]:
+            self.app.notify("Clear the digit before adding notes!")
+            return
+        self.board.toggle_note(index, digit)
+        self.update_notes(index)
+
+    def clear_notes(self) -> None:
+        index = self.selected_cell.index
+        if self.board.notes[index]:
+            self.board.notes[index] = 0
+            self.update_notes(index)
+
+    def update_notes(self, index: int) -> None:
+        notes = self.board.notes[index]
+        self.flat_cells[index].notes = notes
+        self.show_notes(index)
+        self.post_message(self.NotesChanged(index, notes))
+
+    def show_notes(self, index: int | None = None) -> None:
+        # Every pencil mark of the selected cell, which may not fit the cell
+        # itself; with `index`, only if that cell is the selected one
+        cell = self.selected_cell
+        if index is not None and (cell is None or cell.index != index):
+            return
+        notes = 0 if cell is None or self.board.digits[cell.index] else self.board.notes[cell.index]
+        self.border_subtitle = (
+            f"notes {' '.join(str(digit) for digit in range(1, 10) if notes >> (digit - 1) & 1)}"
+            if notes else None
+        )
+
+    def toggle_notes_mode(self) -> None:
+        self.notes_mode = not self.notes_mode
+        self.border_title = "NOTES" if self.notes_mode else None
+
+    def show_hint(self) -> None:
+        if self.board.conflicts:
+            self.app.notify("Fix the conflicting cells first!", severity="warning")
+            return
+        # Eliminations change nothing on the board, so work them through on a
+        # scratch copy until a step places a digit and hint that whole chain
+        digits, candidates = bytearray(self.board.digits), list(self.board.candidates)
+        chain = []
+        while not chain or not chain[-1].placements:
+            step = next_step(digits, candidates)
+            if step is None:
+                break
+            chain.append(step)
+            apply(step, digits, candidates)
+        if not chain:
+            self.app.notify("No logical step found, time to guess!")
+            return
+        step = chain[-1]
+        index = (step.placements or step.eliminations)[0][0]
+        self.move_selection(index // SIZE, index % SIZE)
+        reasons = [step.reason for step in chain]
+        if len(reasons) > 3:
+            reasons[1:-1] = [f"{len(reasons) - 2} more eliminations"]
+        reason = "; then ".join(reasons)
+        if not step.placements:
+            reason += "; then it is time to guess"
+        self.app.notify(reason, title=step.technique.capitalize())
+
+    def travel(self, steps) -> None:
+        self.stop_solving()
+        moved = False
+        for index, digit in steps:
+            self.apply_move(index, digit)
+            moved = True
+        if moved:
+            self.after_move()
+
+    def undo(self) -> None:
+        self.travel(self.history.undo())
+
+    def redo(self) -> None:
+        self.travel(self.history.redo())
+
+    def undo_to_clean(self) -> None:
+        target = self.history.last_clean()
+        if target is None:
+            self.app.notify("No conflict-free state to go back to!")
+        elif target == self.history.cursor:
+            self.app.notify("The board has no conflicts already!")
+        else:
+            self.travel(self.history.steps_to(target))
+
+    def after_move(self) -> None:
+        if self.board.is_solved():
+            self.finished = True
+            self.post_message(self.Solved())
+        elif not self.board.conflicts:
+            self.check_solvable(bytes(self.board.digits))
+
+    @work(thread=True, exclusive=True, group='solvable')
+    def check_solvable(self, digits: bytes) -> None:
+        solvable = is_solvable(digits)
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self.report_solvable, solvable)
+
+    def report_solvable(self, solvable: bool) -> None:
+        if self.solvable and not solvable:
+            self.app.notify("No solution from here, some digit is wrong!", severity="warning")
+        self.solvable = solvable
+
+    def toggle_autosolve(self) -> None:
+        if self.solve_steps is None:
+            if self.start_solving():
+                self.autoplay = True
+        else:
+            self.autoplay = not self.autoplay
+        self.solve_clock = monotonic()
+
+    def solve_step(self) -> None:
+        if self.solve_steps is None and not self.start_solving():
+            return
+        self.autoplay = False
+        self.step_credit += 1
+
+    def solve_faster(self) -> None:
+        self.set_solve_fps(self.solve_fps * 2)
+
+    def solve_slower(self) -> None:
+        self.set_solve_fps(self.solve_fps // 2)
+
+    def set_solve_fps(self, fps: int) -> None:
+        self.solve_fps = max(1, min(fps, 120))
+        if self.solve_timer is not None:
+            self.solve_timer.stop()
+            self.solve_timer = self.set_interval(1 / self.solve_fps, self.solve_frame)
+        self.app.notify(f"{self.solve_fps} steps per second", timeout=1)
+
+    def start_solving(self) -> bool:
+        if self.finished:
+            self.app.notify("The puzzle is already solved!")
+            return False
+        if self.board.conflicts:
+            self.app.notify("Fix the conflicting cells first!", severity="warning")
+            return False
+        # A fresh queue per run, so a cancelled run can never feed the next one
+        self.solve_steps = Queue(self.SOLVE_QUEUE)
+        self.step_credit = 0
+        self.solve_clock = monotonic()
+        self.run_solver(bytes(self.board.digits), self.solve_steps)
+        self.solve_timer = self.set_interval(1 / self.solve_fps, self.solve_frame)
+        self.border_title = "SOLVING"
+        return True
+
+    def stop_solving(self) -> None:
+        if self.solve_steps is None:
+            return
+        self.workers.cancel_group(self, 'autosolve')
+        self.solve_timer.stop()
+        self.solve_timer = None
+        self.solve_steps = None
+        self.autoplay = False
+        self.border_title = "NOTES" if self.notes_mode else None
+
+    @work(thread=True, exclusive=True, group='autosolve')
+    def run_solver(self, digits: bytes, steps: Queue[Trace | None]) -> None:
+        worker = get_current_worker()
+        # None marks the end of the walk
+        for step in chain(walkthrough(digits), (None,)):
+            # The queue is bounded, so the solver only runs a little ahead of the screen
+            while True:
+                if worker.is_cancelled:
+                    return
+                try:
+                    steps.put(step, timeout=0.05)
+                    break
+                except Full:
+                    pass
+
+    def solve_frame(self) -> None:
+        now = monotonic()
+        if self.autoplay:
+            # A frame that comes late plays every step that fell due meanwhile
+            due = max(1, round((now - self.solve_clock) * self.solve_fps))
+        else:
+            due, self.step_credit = self.step_credit, 0
+        self.solve_clock = now
+        if due:
+            self.play_steps(due)
+
+    def play_steps(self, count: int) -> None:
+        # Coalesce the steps into their net effect on each cell, so a frame
+        # costs one update per touched cell however many steps it plays
+        placed: dict[int, Trace] = {}
+        eliminated: dict[int, int] = {}
+        done = False
+        for _ in range(count):
+            try:
+                step = self.solve_steps.get_nowait()
+            except Empty:
+                # The solver has not caught up; ask again next frame
+                if not self.autoplay:
+                    self.step_credit += 1
+                break
+            if step is None:
+                done = True
+                break
+            if step.kind != "eliminate":
+                placed[step.index] = step
+            elif not step.depth:
+                # Eliminations made under a guess may be wrong, and backtracking
+                # would not bring the pencil marks back, so they stay off the notes
+                eliminated[step.index] = eliminated.get(step.index, 0) | 1 << (step.digit - 1)
+
+        with self.app.batch_update():
+            for index, step in placed.items():
+                old = self.board.digits[index]
+                if old != step.digit:
+                    # The same goes for a guessed digit pruning its peers' notes
+                    self.apply_move(index, step.digit, prune=not step.depth)
+                    self.history.push(index, old, step.digit, not self.board.conflicts)
+            for index, mask in eliminated.items():
+                if self.board.notes[index] & mask:
+                    self.board.notes[index] &= ~mask
+                    self.update_notes(index)
+        if len(placed) == 1:
+            # Follow a single placement around the board; bursts just land
+            self.select_cell(self.flat_cells[next(iter(placed))])
+
+        if self.board.is_solved():
+            self.stop_solving()
+            self.finished = True
+            self.post_message(self.Solved(assisted=True))
+        elif done:
+            self.stop_solving()
+            self.app.notify("No solution from here, some digit is wrong!", severity="warning")
+
+    def on_cell_clicked(self, event: Cell.Clicked) -> None:
+        self.select_cell(event.cell)
+            
+                
+    async def on_key(self, event: Key) -> None:
+        if event.key in self.SOLVE_KEYS:
+            event.stop()
+            getattr(self, self.SOLVE_KEYS[event.key])()
+        elif self.selected_cell:
+            if event.key.isdecimal() or event.key == 'backspace':
+                if self.finished:
+                    self.app.notify("The puzzle is already solved!")
+                elif self.board.givens[self.selected_cell.index]:
+                    self.app.notify("This Cell Can not be Modified!")
+                else:
+                    match event.key:
+                        case '0':
+                            self.app.notify('0 is not a valid input!')
+                        case 'backspace' if self.notes_mode:
+                            self.clear_notes()
+                        case 'backspace':
+                            self.place_digit(0)
+                        case _ if self.notes_mode:
+                            self.toggle_note(int(event.key))
+                        case _:
+                            self.place_digit(int(event.key))
+            elif event.key in self.TOOL_KEYS:
+                getattr(self, self.TOOL_KEYS[event.key])()
+            elif event.key in self.HISTORY_KEYS:
+                if self.finished:
+                    self.app.notify("The puzzle is already solved!")
+                else:
+                    getattr(self, self.HISTORY_KEYS[event.key])()
+            else:
+                new_row, new_col = self.selected_cell.row, self.selected_cell.col
+                match event.key:
+                    case "up":
+                        new_row -= 1
+                    case "down":
+                        new_row += 1
+                    case "left":
+                        new_col -= 1
+                    case "right":
+                        new_col += 1
+                    case _:
+                        pass
+                
+                self.move_selection(new_row, new_col) 
+               
+            
+
+    def move_selection(self, row: int, col: int) -> None:
+        self.select_cell(self.cells[row % 9][col % 9])
+
+class MyApp(App):
+
+    CSS_PATH = "test.tcss"
+
+    def compose(self):
+        yield SudokuGrid3X3()
+
+if __name__ == "__main__": MyApp().run()
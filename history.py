@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from array import array
+from typing import Iterator
+
+# A 9x9 move packs into 16 bits: cell (7) | old digit (4) | new digit (4).
+# Bigger grids use 32 bits with 5 bits per digit.
+def pack(cell: int, old: int, new: int, bits: int = 4) -> int:
+    return (cell << bits | old) << bits | new
+
+
+def unpack(move: int, bits: int = 4) -> tuple[int, int, int]:
+    digit = (1 << bits) - 1
+    return move >> 2 * bits, move >> bits & digit, move & digit
+
+
+class History:
+    """Undo/redo log of packed moves.
+
+    `clean[k]` records whether the board was conflict-free after the first k
+    moves, so rewinding to the last clean state is a backwards scan of a
+    bytearray and never touches the board until the target is known.
+    """
+
+    __slots__ = ("moves", "clean", "cursor", "bits")
+
+    def __init__(self, clean: bool = True, size: int = 9) -> None:
+        self.bits = 4 if size < 16 else 5
+        self.moves = array("H" if size < 16 else "L")
+        self.clean = bytearray((clean,))
+        self.cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def push(self, cell: int, old: int, new: int, clean: bool) -> None:
+        # A new move forks history: the redo tail is gone
+        del self.moves[self.cursor:]
+        del self.clean[self.cursor + 1:]
+        self.moves.append(pack(cell, old, new, self.bits))
+        self.clean.append(clean)
+        self.cursor += 1
+
+    def last_clean(self) -> int | None:
+        # The current position counts: a clean board is its own last clean state
+        position = self.clean.rfind(1, 0, self.cursor + 1)
+        return None if position < 0 else position
+
+    def steps_to(self, target: int) -> Iterator[tuple[int, int]]:
+        """Yield the (cell, digit) placements that take the board to `target`."""
+        target = max(0, min(target, len(self.moves)))
+        while self.cursor > target:
+            self.cursor -= 1
+            cell, old, _ = unpack(self.moves[self.cursor], self.bits)
+            yield cell, old
+        while self.cursor < target:
+            cell, _, new = unpack(self.moves[self.cursor], self.bits)
+            self.cursor += 1
+            yield cell, new
+
+    def undo(self) -> Iterator[tuple[int, int]]:
+        return self.steps_to(self.cursor - 1)
+
+    def redo(self) -> Iterator[tuple[int, int]]:
+        return self.steps_to(self.cursor + 1)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from queue import Empty, Queue
+from time import time
+from typing import NamedTuple
+
+from paths import data_path
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS games (
+        id INTEGER PRIMARY KEY,
+        difficulty TEXT NOT NULL,
+        seconds REAL NOT NULL,
+        moves INTEGER NOT NULL,
+        finished_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS games_by_rank ON games (difficulty, seconds, id);
+    CREATE INDEX IF NOT EXISTS games_by_age ON games (finished_at);
+"""
+
+# Retention: the best KEEP_BEST games per difficulty are kept forever, anything
+# else is dropped once it is older than KEEP_DAYS.
+KEEP_BEST = 1000
+KEEP_DAYS = 90
+# The writer compacts after this many inserts.
+COMPACT_EVERY = 500
+
+
+class Entry(NamedTuple):
+    id: int
+    difficulty: str
+    seconds: float
+    moves: int
+    finished_at: float
+
+
+class Leaderboard:
+    """Finished games in SQLite, written from a background thread.
+
+    The database runs in WAL mode so the UI can read pages while the writer
+    commits. Pages are keyset-paginated on the (difficulty, seconds, id)
+    index, so fetching page 1000 costs the same as fetching page 1.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path or data_path("leaderboard.sqlite3")
+        self.reader = self._connect()
+        self.reader.executescript(SCHEMA)
+        self._pending: Queue[tuple | None] = Queue()
+        self._writer = threading.Thread(target=self._write, name="leaderboard", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def record(self, difficulty: str, seconds: float, moves: int) -> None:
+        self._pending.put((difficulty, seconds, moves, time()))
+
+    def page(self, difficulty: str, limit: int = 10, after: Entry | None = None) -> list[Entry]:
+        if after is None:
+            rows = self.reader.execute(
+                "SELECT * FROM games WHERE difficulty = ? ORDER BY seconds, id LIMIT ?",
+                (difficulty, limit),
+            )
+        else:
+            rows = self.reader.execute(
+                "SELECT * FROM games WHERE difficulty = ? AND (seconds, id) > (?, ?)"
+                " ORDER BY seconds, id LIMIT ?",
+                (difficulty, after.seconds, after.id, limit),
+            )
+        return [Entry(*row) for row in rows]
+
+    def compact(self, connection: sqlite3.Connection | None = None) -> int:
+        connection = connection or self.reader
+        with connection:
+            deleted = connection.execute(
+                """
+                DELETE FROM games WHERE finished_at < ? AND id NOT IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY difficulty ORDER BY seconds, id
+                        ) AS position FROM games
+                    ) WHERE position <= ?
+                )
+                """,
+                (time() - KEEP_DAYS * 86400, KEEP_BEST),
+            ).rowcount
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return deleted
+
+    def close(self) -> None:
+        self._pending.put(None)
+        self._writer.join()
+        self.reader.close()
+
+    def _write(self) -> None:
+        connection = self._connect()
+        inserted = 0
+        running = True
+        while running:
+            batch = [self._pending.get()]
+            # Drain whatever else is queued so a burst lands in one transaction
+            while True:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [game for game in batch if game is not None]
+            if batch:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO games (difficulty, seconds, moves, finished_at) VALUES (?, ?, ?, ?)",
+                        batch,
+                    )
+                inserted += len(batch)
+            if inserted >= COMPACT_EVERY or (inserted and not running):
+                self.compact(connection)
+                inserted = 0
+        connection.close()
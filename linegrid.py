@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+from rich.segment import Segment
+from rich.style import Style
+
+from textual.app import App, ComposeResult
+from textual.events import Click, Key
+from textual.geometry import Region, Size
+from textual.message import Message
+from textual.strip import Strip
+from textual.timer import Timer
+from textual.widget import Widget
+
+from board import Board
+from generator import generate_grid
+from history import History
+
+
+class LineGrid(Widget, can_focus=True):
+    """A grid of any box size drawn line by line by a single widget.
+
+    One Static per cell does not scale to 625 cells, so the board renders
+    itself through the line API and every change refreshes only the regions
+    of the cells it touched. Digits above 9 are typed as two keys; a key
+    that cannot start a longer digit commits at once, anything else after
+    ENTRY_TIMEOUT seconds or on enter.
+    """
+
+    DEFAULT_CSS = """
+        LineGrid {
+            width: auto;
+            height: auto;
+            color: #0F0;
+            background: $success-lighten-3 15%;
+        }
+
+        LineGrid > .line-grid--given {
+            color: white 50%;
+            text-style: italic;
+        }
+
+        LineGrid > .line-grid--error {
+            color: red;
+        }
+
+        LineGrid > .line-grid--neighbour {
+            background: $success-lighten-3 10%;
+        }
+
+        LineGrid > .line-grid--selected {
+            background: $surface-lighten-3;
+        }
+
+        LineGrid > .line-grid--keyline {
+            color: $success-darken-3;
+        }
+    """
+
+    COMPONENT_CLASSES = {
+        "line-grid--given",
+        "line-grid--error",
+        "line-grid--neighbour",
+        "line-grid--selected",
+        "line-grid--keyline",
+    }
+
+    HISTORY_KEYS = {
+        'ctrl+z': 'undo',
+        'ctrl+y': 'redo',
+    }
+
+    MOVES = {
+        'up': (-1, 0),
+        'down': (1, 0),
+        'left': (0, -1),
+        'right': (0, 1),
+    }
+
+    ENTRY_TIMEOUT = 0.8
+
+    class Moved(Message):
+        def __init__(self, index: int, digit: int) -> None:
+            self.index = index
+            self.digit = digit
+            super().__init__()
+
+    class Solved(Message):
+        pass
+
+    def __init__(self, board: Board) -> None:
+        super().__init__()
+        self.board = board
+        self.geometry = board.geometry
+        self.history = History(not board.conflicts, self.geometry.size)
+        self.finished = False
+        self.selected: int | None = None
+        self.highlighted: frozenset[int] = frozenset()
+        self.entry = ""
+        self.entry_timer: Timer | None = None
+        # Every cell is a space plus the widest digit; stacks are split by a keyline
+        self.cell_width = len(str(self.geometry.size)) + 1
+
+    def get_content_width(self, container: Size, viewport: Size) -> int:
+        # Cells, a keyline between stacks and one trailing space
+        box, size = self.geometry.box, self.geometry.size
+        return size * self.cell_width + box
+
+    def get_content_height(self, container: Size, viewport: Size, width: int) -> int:
+        box, size = self.geometry.box, self.geometry.size
+        return size + box - 1
+
+    def cell_region(self, index: int) -> Region:
+        row, col = self.geometry.row_of[index], self.geometry.col_of[index]
+        box = self.geometry.box
+        return Region(col * self.cell_width + col // box, row + row // box, self.cell_width, 1)
+
+    def cell_at(self, x: int, y: int) -> int | None:
+        box, size = self.geometry.box, self.geometry.size
+        band, line = divmod(y, box + 1)
+        stack, offset = divmod(x, box * self.cell_width + 1)
+        if line == box or offset == box * self.cell_width:
+            return None
+        row, col = band * box + line, stack * box + offset // self.cell_width
+        if row >= size or col >= size:
+            return None
+        return row * size + col
+
+    def refresh_cells(self, cells) -> None:
+        self.refresh(*(self.cell_region(index) for index in cells))
+
+    def render_line(self, y: int) -> Strip:
+        box, size = self.geometry.box, self.geometry.size
+        base = self.rich_style
+        keyline = base + self.get_component_rich_style("line-grid--keyline")
+        band, line = divmod(y, box + 1)
+        if line == box:
+            rule = "┼".join(["─" * (box * self.cell_width)] * box) + "─"
+            return Strip([Segment(rule, keyline)])
+
+        given = self.get_component_rich_style("line-grid--given")
+        error = self.get_component_rich_style("line-grid--error")
+        neighbour = self.get_component_rich_style("line-grid--neighbour")
+        selected = self.get_component_rich_style("line-grid--selected")
+        board = self.board
+        row = band * box + line
+        segments = []
+        for col in range(size):
+            index = row * size + col
+            if col and not col % box:
+                segments.append(Segment("│", keyline))
+            style = base
+            if board.givens[index]:
+                style += given
+            if board.errors[index]:
+                style += error
+            if index == self.selected:
+                style += selected
+            elif index in self.highlighted:
+                style += neighbour
+            if index == self.selected and self.entry:
+                text = self.entry.rjust(self.cell_width)
+                style += Style(underline=True)
+            elif board.digits[index]:
+                text = str(board.digits[index]).rjust(self.cell_width)
+            else:
+                text = "·".rjust(self.cell_width)
+                style += Style(dim=True)
+            segments.append(Segment(text, style))
+        segments.append(Segment(" ", base))
+        return Strip(segments)
+
+    def select(self, index: int) -> None:
+        self.commit_entry()
+        highlighted = self.geometry.peer_sets[index]
+        changed = self.highlighted ^ highlighted
+        changed |= {index} if self.selected is None else {index, self.selected}
+        self.selected = index
+        self.highlighted = highlighted
+        self.refresh_cells(changed)
+
+    def on_click(self, event: Click) -> None:
+        index = self.cell_at(event.x, event.y)
+        if index is not None:
+            self.select(index)
+
+    def on_key(self, event: Key) -> None:
+        if self.selected is None:
+            if event.key in self.MOVES:
+                self.select(0)
+            return
+        if event.key.isdecimal() or event.key in ('backspace', 'delete', 'enter'):
+            event.stop()
+            if self.finished:
+                self.app.notify("The puzzle is already solved!")
+            elif self.board.givens[self.selected]:
+                self.app.notify("This Cell Can not be Modified!")
+            elif event.key == 'enter':
+                self.commit_entry()
+            elif event.key in ('backspace', 'delete'):
+                if self.entry:
+                    self.cancel_entry()
+                else:
+                    self.place_digit(self.selected, 0)
+            else:
+                self.type_digit(event.key)
+        elif event.key in self.HISTORY_KEYS:
+            event.stop()
+            self.commit_entry()
+            if self.finished:
+                self.app.notify("The puzzle is already solved!")
+            else:
+                getattr(self, self.HISTORY_KEYS[event.key])()
+        elif event.key in self.MOVES:
+            event.stop()
+            size = self.geometry.size
+            row, col = divmod(self.selected, size)
+            rows, cols = self.MOVES[event.key]
+            self.select((row + rows) % size * size + (col + cols) % size)
+
+    def type_digit(self, key: str) -> None:
+        size = self.geometry.size
+        entry = self.entry + key
+        if int(entry) > size:
+            # The key starts a new digit rather than extending the pending one
+            self.commit_entry()
+            entry = key
+        if not int(entry):
+            self.app.notify('0 is not a valid input!')
+            return
+        self.entry = entry
+        if self.entry_timer is not None:
+            self.entry_timer.stop()
+            self.entry_timer = None
+        if int(entry) * 10 > size:
+            self.commit_entry()
+        else:
+            self.entry_timer = self.set_timer(self.ENTRY_TIMEOUT, self.commit_entry)
+            self.refresh_cells((self.selected,))
+
+    def cancel_entry(self) -> None:
+        if self.entry_timer is not None:
+            self.entry_timer.stop()
+            self.entry_timer = None
+        if self.entry:
+            self.entry = ""
+            self.refresh_cells((self.selected,))
+
+    def commit_entry(self) -> None:
+        entry = self.entry
+        self.cancel_entry()
+        if entry:
+            self.place_digit(self.selected, int(entry))
+
+    def place_digit(self, index: int, digit: int) -> None:
+        old = self.board.digits[index]
+        if old == digit:
+            return
+        self.apply_move(index, digit)
+        self.history.push(index, old, digit, not self.board.conflicts)
+        self.after_move()
+
+    def apply_move(self, index: int, digit: int) -> None:
+        changed = self.board.place(index, digit)
+        self.refresh_cells((index, *changed))
+        self.post_message(self.Moved(index, digit))
+
+    def travel(self, steps) -> None:
+        moved = False
+        for index, digit in steps:
+            self.apply_move(index, digit)
+            moved = True
+        if moved:
+            self.after_move()
+
+    def undo(self) -> None:
+        self.travel(self.history.undo())
+
+    def redo(self) -> None:
+        self.travel(self.history.redo())
+
+    def after_move(self) -> None:
+        if self.board.is_solved():
+            self.finished = True
+            self.post_message(self.Solved())
+
+
+class BigApp(App):
+
+    CSS_PATH = "test.tcss"
+
+    def compose(self) -> ComposeResult:
+        yield LineGrid(Board(generate_grid("Medium", 5)))
+
+
+if __name__ == "__main__": BigApp().run()
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, NamedTuple
+
+from board import BOX_OF, CELLS, COL_OF, FULL, PEERS, ROW_OF, SIZE, UNITS
+from rules import LEVELS
+from solver import POPCOUNT, DIGIT_OF
+
+# Human solving techniques, easiest first, and the level each one implies.
+TECHNIQUES = {
+    "naked single": "Easy",
+    "hidden single": "Easy",
+    "locked candidates": "Medium",
+    "naked pair": "Medium",
+    "hidden pair": "Medium",
+    "x-wing": "Hard",
+}
+
+Move = tuple[int, int]
+
+
+class Step(NamedTuple):
+    technique: str
+    placements: tuple[Move, ...]
+    eliminations: tuple[Move, ...]
+    reason: str
+
+
+class Trace(NamedTuple):
+    # "place", "eliminate" or "backtrack"; a backtrack clears the cell again
+    kind: str
+    index: int
+    digit: int
+    # Guesses still open when the step was taken; only depth 0 is certain
+    depth: int = 0
+
+
+def name(index: int) -> str:
+    return f"r{ROW_OF[index] + 1}c{COL_OF[index] + 1}"
+
+
+def unit_name(unit: int) -> str:
+    kind, number = divmod(unit, SIZE)
+    return f"{('row', 'column', 'box')[kind]} {number + 1}"
+
+
+def digits_in(mask: int) -> list[int]:
+    return [digit for digit in range(1, SIZE + 1) if mask >> (digit - 1) & 1]
+
+
+def candidates_of(digits: Iterable[int]) -> list[int]:
+    digits = bytes(digits)
+    return [
+        0 if digits[index] else FULL & ~sum(
+            {1 << (digits[peer] - 1) for peer in PEERS[index] if digits[peer]}
+        )
+        for index in range(CELLS)
+    ]
+
+
+def apply(step: Step, digits: bytearray, candidates: list[int]) -> None:
+    for index, digit in step.placements:
+        bit = 1 << (digit - 1)
+        digits[index] = digit
+        candidates[index] = 0
+        for peer in PEERS[index]:
+            candidates[peer] &= ~bit
+    for index, digit in step.eliminations:
+        candidates[index] &= ~(1 << (digit - 1))
+
+
+Places = list[list[list[int]]]
+
+
+def unit_places(candidates: list[int]) -> Places:
+    """For every unit and digit, the cells of that unit where the digit can still go.
+
+    Built once per step and shared by all the finders.
+    """
+    places = []
+    for cells in UNITS:
+        where: list[list[int]] = [[] for _ in range(SIZE + 1)]
+        for index in cells:
+            mask = candidates[index]
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                where[DIGIT_OF[bit]].append(index)
+        places.append(where)
+    return places
+
+
+def _eliminate(cells: Iterable[int], keep: Iterable[int], mask: int, candidates: list[int]) -> tuple[Move, ...]:
+    keep = set(keep)
+    return tuple(
+        (index, digit)
+        for index in cells
+        if index not in keep and candidates[index] & mask
+        for digit in digits_in(candidates[index] & mask)
+    )
+
+
+def naked_single(candidates: list[int], places: Places) -> Step | None:
+    for index, mask in enumerate(candidates):
+        if POPCOUNT[mask] == 1:
+            digit = DIGIT_OF[mask]
+            return Step(
+                "naked single", ((index, digit),), (),
+                f"{name(index)} can only be {digit}",
+            )
+    return None
+
+
+def hidden_single(candidates: list[int], places: Places) -> Step | None:
+    for unit, where_of in enumerate(places):
+        for digit in range(1, SIZE + 1):
+            where = where_of[digit]
+            if len(where) == 1:
+                return Step(
+                    "hidden single", ((where[0], digit),), (),
+                    f"{name(where[0])} is the only place for {digit} in {unit_name(unit)}",
+                )
+    return None
+
+
+def locked_candidates(candidates: list[int], places: Places) -> Step | None:
+    for unit, where_of in enumerate(places):
+        for digit in range(1, SIZE + 1):
+            bit = 1 << (digit - 1)
+            where = where_of[digit]
+            if len(where) < 2:
+                continue
+            # A box whose candidates sit on one line (pointing), or a line whose
+            # candidates sit in one box (claiming).
+            if unit >= 2 * SIZE:
+                lines = {ROW_OF[index] for index in where}, {SIZE + COL_OF[index] for index in where}
+            else:
+                lines = ({2 * SIZE + BOX_OF[index] for index in where},)
+            for line in lines:
+                if len(line) != 1:
+                    continue
+                other = next(iter(line))
+                eliminations = _eliminate(UNITS[other], where, bit, candidates)
+                if eliminations:
+                    return Step(
+                        "locked candidates", (), eliminations,
+                        f"{digit} in {unit_name(unit)} is confined to {unit_name(other)}",
+                    )
+    return None
+
+
+def naked_pair(candidates: list[int], places: Places) -> Step | None:
+    for unit, cells in enumerate(UNITS):
+        pairs = [index for index in cells if POPCOUNT[candidates[index]] == 2]
+        for position, first in enumerate(pairs):
+            for second in pairs[position + 1:]:
+                mask = candidates[first]
+                if candidates[second] != mask:
+                    continue
+                eliminations = _eliminate(cells, (first, second), mask, candidates)
+                if eliminations:
+                    a, b = digits_in(mask)
+                    return Step(
+                        "naked pair", (), eliminations,
+                        f"{name(first)} and {name(second)} hold {a} and {b} in {unit_name(unit)}",
+                    )
+    return None
+
+
+def hidden_pair(candidates: list[int], places: Places) -> Step | None:
+    for unit, where_of in enumerate(places):
+        pairs: dict[tuple[int, ...], list[int]] = {}
+        for digit in range(1, SIZE + 1):
+            if len(where_of[digit]) == 2:
+                pairs.setdefault(tuple(where_of[digit]), []).append(digit)
+        for where, pair in pairs.items():
+            if len(pair) != 2:
+                continue
+            mask = (1 << (pair[0] - 1)) | (1 << (pair[1] - 1))
+            eliminations = _eliminate(where, (), FULL & ~mask, candidates)
+            if eliminations:
+                return Step(
+                    "hidden pair", (), eliminations,
+                    f"{pair[0]} and {pair[1]} only fit {name(where[0])} and {name(where[1])} in {unit_name(unit)}",
+                )
+    return None
+
+
+def x_wing(candidates: list[int], places: Places) -> Step | None:
+    for digit in range(1, SIZE + 1):
+        bit = 1 << (digit - 1)
+        for base, cover, position in ((0, SIZE, COL_OF), (SIZE, 0, ROW_OF)):
+            lines: dict[tuple[int, ...], list[int]] = {}
+            for line in range(base, base + SIZE):
+                where = places[line][digit]
+                if len(where) == 2:
+                    lines.setdefault(tuple(position[index] for index in where), []).append(line)
+            for crossing, found in lines.items():
+                if len(found) != 2:
+                    continue
+                corners = [index for line in found for index in places[line][digit]]
+                eliminations = tuple(
+                    move
+                    for offset in crossing
+                    for move in _eliminate(UNITS[cover + offset], corners, bit, candidates)
+                )
+                if eliminations:
+                    return Step(
+                        "x-wing", (), eliminations,
+                        f"{digit} forms an x-wing on {unit_name(found[0])} and {unit_name(found[1])}",
+                    )
+    return None
+
+
+FINDERS = (naked_single, hidden_single, locked_candidates, naked_pair, hidden_pair, x_wing)
+
+
+def next_step(digits: bytearray, candidates: list[int]) -> Step | None:
+    # Naked singles need no unit index, and they are the common case
+    step = naked_single(candidates, [])
+    if step is not None:
+        return step
+    places = unit_places(candidates)
+    for finder in FINDERS[1:]:
+        step = finder(candidates, places)
+        if step is not None:
+            return step
+    return None
+
+
+def grade(puzzle: Iterable[int]) -> tuple[str, dict[str, int]]:
+    """Solve with human techniques only and return the level plus how often each was used.
+
+    Puzzles the techniques cannot finish need guessing and are graded Hard.
+    """
+    digits = bytearray(puzzle)
+    candidates = candidates_of(digits)
+    used: dict[str, int] = {}
+    while not all(digits):
+        step = next_step(digits, candidates)
+        if step is None:
+            return "Hard", used
+        used[step.technique] = used.get(step.technique, 0) + 1
+        apply(step, digits, candidates)
+    level = max((TECHNIQUES[technique] for technique in used), key=LEVELS.index, default="Easy")
+    return level, used
+
+
+def walkthrough(puzzle: Iterable[int]) -> Iterator[Trace]:
+    """Every placement, elimination and backtrack of solving `puzzle`, for showing it.
+
+    Human techniques go first. When they run dry the most constrained cell
+    is guessed, and a guess that runs into a contradiction is undone along
+    with every digit placed after it. A puzzle with no solution ends up
+    backtracked to where it started. Every step carries the number of
+    guesses it depends on, so only the depth 0 ones are facts about the
+    puzzle.
+    """
+    digits = bytearray(puzzle)
+    start = bytes(digits)
+    candidates = candidates_of(digits)
+
+    def walk(depth: int) -> Iterator[Trace]:
+        while not all(digits):
+            if any(not digit and not mask for digit, mask in zip(digits, candidates)):
+                return False
+            step = next_step(digits, candidates)
+            if step is None:
+                break
+            for index, digit in step.placements:
+                yield Trace("place", index, digit, depth)
+            for index, digit in step.eliminations:
+                yield Trace("eliminate", index, digit, depth)
+            apply(step, digits, candidates)
+        else:
+            return True
+
+        index = min(
+            (index for index in range(CELLS) if not digits[index]),
+            key=lambda index: POPCOUNT[candidates[index]],
+        )
+        saved_digits, saved_candidates = bytes(digits), candidates[:]
+        for digit in digits_in(candidates[index]):
+            yield Trace("place", index, digit, depth + 1)
+            apply(Step("guess", ((index, digit),), (), ""), digits, candidates)
+            if (yield from walk(depth + 1)):
+                return True
+            for cell in range(CELLS):
+                if digits[cell] != saved_digits[cell]:
+                    yield Trace("backtrack", cell, 0, depth + 1)
+            digits[:] = saved_digits
+            candidates[:] = saved_candidates
+            candidates[index] &= ~(1 << (digit - 1))
+            saved_candidates[index] = candidates[index]
+            # As certain as whatever led up to the guess
+            yield Trace("eliminate", index, digit, depth)
+        return False
+
+    if not (yield from walk(0)):
+        for index in range(CELLS):
+            if digits[index] != start[index]:
+                yield Trace("backtrack", index, 0)
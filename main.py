@@ -1,61 +1,381 @@
+from __future__ import annotations
+
+# First, so the startup report covers every other import
+import startup
+
+import sys
+from functools import partial
+from typing import TYPE_CHECKING, Callable
+
 from textual.app import App, ComposeResult
-from textual.widgets import Static, Select
-from textual.containers import Center
-from textual import on
+from textual.widgets import Static, Select, DataTable
+from textual.containers import Center, Horizontal
+from textual import on, work
+from textual.worker import get_current_worker
+
+startup.mark("import textual")
 
-from art import text2art
+from datetime import datetime
 
-from widgets import CenteredButton, DigitalClock, CustomButton
+from banner import banner
+from widgets import CenteredButton, DigitalClock, CustomButton, CustomTimer, PerfOverlay, SimpleCounter
 from containers import MidCenter
+from pool import PuzzlePool, DIFFICULTIES, DEFAULT_DIFFICULTY, decode
+from daily import DailyPuzzles
+from leaderboard import Leaderboard, Entry
+from savegame import Autosave, SaveState
+import replay
+
+startup.mark("import game modules")
+
+# The grid, board model and solver load with the first game screen
+if TYPE_CHECKING:
+    from grid import SudokuGrid3X3
 
 
 class Main(App[None]):
     CSS_PATH = "test.tcss"
 
+    LEADERBOARD_PAGE = 10
+
+    BINDINGS = [("f12", "toggle_perf", "Performance overlay")]
+
+    # Box sizes offered on the new game screen
+    GRID_SIZES = [("9×9", 3), ("16×16", 4), ("25×25", 5)]
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Loads the spare puzzles and starts the (sleeping) filler thread. The
+        # worker process is spawned by the first submit, which only comes once
+        # the first frame is up and the pool is woken.
+        self.pool = PuzzlePool().start(fill=False)
+        self.recorder: replay.Recorder | None = None
+        self.daily = DailyPuzzles()
+        startup.mark("start pool")
+
     def load_choose_difficulty_screen(self) -> None:
         self.inner_center.query(CenteredButton).remove()
         self.inner_center.mount(
             Center(
                 Select.from_values(
-                    ("Easy", "Medium", "Hard"),
-                    prompt= "Choose a difficulty"
+                    DIFFICULTIES,
+                    prompt= "Choose a difficulty",
+                    id='difficulty'
+                )
+            ),
+            Center(
+                Select(
+                    self.GRID_SIZES,
+                    value=3,
+                    allow_blank=False,
+                    id='grid-size'
                 )
             ),
             CenteredButton('Start Game', btn_id='start-game'),
             CenteredButton('Back to Home', btn_id='back-to-home')
         )
 
+    async def load_game_screen(
+        self, difficulty: str, state: SaveState | None = None, box: int = 3, puzzle: str | None = None
+    ) -> None:
+        from board import Board
+        from grid import SudokuGrid3X3
+
+        self.difficulty = difficulty
+        timer = CustomTimer()
+        counter = SimpleCounter()
+        if box != 3:
+            # Bigger grids are practice games: no pool, autosave or leader board
+            from generator import generate_grid
+            from linegrid import LineGrid
+
+            grid = LineGrid(Board(generate_grid(difficulty, box)))
+        elif state is None:
+            puzzle = puzzle or self.pool.take(difficulty, block=False)
+            if puzzle is None:
+                await self.load_preparing_screen()
+                self.load_when_ready(difficulty, partial(self.pool.take, difficulty))
+                return
+            board = Board.from_rows(decode(puzzle))
+            self.log(pool=self.pool.stats)
+            self.autosave.start(SaveState(
+                difficulty, board.givens, bytes(board.digits), (0,) * len(board.digits), 0.0, 0
+            ))
+        else:
+            board = Board(state.digits, state.givens)
+            board.notes = list(state.notes)
+            timer.total_time = state.elapsed
+            counter.value = state.moves
+        if box == 3:
+            grid = SudokuGrid3X3(board=board)
+            self.recorder = grid.recorder = replay.Recorder(difficulty, board)
+            self.watch(timer, "pause", self.record_pause, init=False)
+        await self.inner_center.query().remove()
+        await self.inner_center.mount(
+            Horizontal(
+                timer,
+                grid,
+                counter,
+                id='game'
+            ),
+            CenteredButton('Back to Home', btn_id='back-to-home')
+        )
+        timer.start_timer()
+
+    async def load_preparing_screen(self) -> None:
+        await self.inner_center.query().remove()
+        await self.inner_center.mount(
+            Center(Static("Preparing puzzle…", id='preparing')),
+            CenteredButton('Back to Home', btn_id='back-to-home')
+        )
+
+    @work(thread=True, exclusive=True, group='puzzle')
+    def load_when_ready(self, difficulty: str, fetch: Callable[[], str], notice: str | None = None) -> None:
+        # Waits for a puzzle that is still being generated, then starts it
+        puzzle = fetch()
+        if get_current_worker().is_cancelled:
+            return
+        self.call_from_thread(self.load_game_screen, difficulty, puzzle=puzzle)
+        if notice is not None:
+            self.call_from_thread(self.notify, notice)
+
+    async def load_leaderboard_screen(self) -> None:
+        await self.inner_center.query().remove()
+        table = DataTable(id='leaderboard', cursor_type='row')
+        table.add_columns("#", "Time", "Moves", "Finished")
+        await self.inner_center.mount(
+            Center(
+                Select.from_values(
+                    DIFFICULTIES,
+                    value=DEFAULT_DIFFICULTY,
+                    allow_blank=False,
+                    id='leaderboard-difficulty'
+                )
+            ),
+            Center(table),
+            Horizontal(
+                CenteredButton('Previous', btn_id='leaderboard-previous'),
+                CenteredButton('Next', btn_id='leaderboard-next'),
+                id='leaderboard-pager'
+            ),
+            CenteredButton('Back to Home', btn_id='back-to-home')
+        )
+        # Keyset cursors: the last entry of every page shown so far
+        self.leaderboard_pages: list[Entry | None] = [None]
+        self.show_leaderboard_page()
+
+    def show_leaderboard_page(self) -> None:
+        select = self.query_one('#leaderboard-difficulty', Select)
+        entries = self.leaderboard.page(
+            select.value, self.LEADERBOARD_PAGE, self.leaderboard_pages[-1]
+        )
+        if not entries and len(self.leaderboard_pages) > 1:
+            self.leaderboard_pages.pop()
+            return
+        table = self.query_one('#leaderboard', DataTable)
+        table.clear()
+        first_rank = (len(self.leaderboard_pages) - 1) * self.LEADERBOARD_PAGE + 1
+        for rank, entry in enumerate(entries, first_rank):
+            minutes, seconds = divmod(int(entry.seconds), 60)
+            table.add_row(
+                str(rank),
+                f"{minutes:02}:{seconds:02}",
+                str(entry.moves),
+                datetime.fromtimestamp(entry.finished_at).strftime("%Y-%m-%d %H:%M"),
+            )
+        self._last_leaderboard_entry = entries[-1] if entries else None
+
+    async def load_replay_screen(self) -> None:
+        from viewer import ReplayViewer
+
+        viewer = ReplayViewer(replay.Replay.load(replay.latest()))
+        await self.inner_center.query().remove()
+        await self.inner_center.mount(
+            Center(viewer),
+            CenteredButton('Back to Home', btn_id='back-to-home')
+        )
+        viewer.focus()
+
     def load_home_screen(self) -> None:
         self.inner_center.query().remove()
+        if self.autosave.exists():
+            self.inner_center.mount(CenteredButton('Resume', btn_id='resume'))
+        if replay.latest() is not None:
+            self.inner_center.mount(CenteredButton('Last Replay', btn_id='last-replay'))
         self.inner_center.mount(
             CenteredButton('New Game', btn_id='new-game'),
+            CenteredButton('Daily Puzzle', btn_id='daily'),
             CenteredButton('Leader Board', btn_id='leader-board'),
             CenteredButton('Quit', btn_id='quit')
         )
 
     def compose(self) -> ComposeResult:
         with MidCenter():
-            yield Static(text2art("PySudoku", font='tarty-1'), id='title')
+            yield PerfOverlay()
+            yield Static(banner("PySudoku", "tarty-1"), id='title')
             self.inner_center = Center()
             yield self.inner_center
             yield DigitalClock()
+        startup.mark("compose")
 
     def on_mount(self) -> None:
+        self.leaderboard = Leaderboard()
+        self.autosave = Autosave()
         self.load_home_screen()
-        
+        startup.mark("mount")
+
+    def on_ready(self) -> None:
+        startup.mark("first paint")
+        self.log(startup.report())
+        self.pool.wake()
+        # The coming week's puzzles, so opening the daily one never generates
+        self.daily.precompute(self.pool.submit)
+        self.preload_game()
+
+    @work(thread=True, group='preload')
+    def preload_game(self) -> None:
+        # Warm the game modules while the player is still on the menu
+        import grid  # noqa: F401
+
+    def on_unmount(self) -> None:
+        self.pool.stop()
+        self.leaderboard.close()
+        self.autosave.close()
+        self.save_replay()
+
+    def close_game(self) -> None:
+        # Fold the journal into the snapshot with the exact time on the clock
+        for timer in self.query(CustomTimer):
+            self.autosave.close(timer.spended_time())
+        self.save_replay()
+
+    def save_replay(self) -> None:
+        if self.recorder is not None and len(self.recorder):
+            self.recorder.save()
+        self.recorder = None
+
+    def record_pause(self, pause: bool) -> None:
+        if self.recorder is not None:
+            self.recorder.record(replay.PAUSE if pause else replay.RESUME)
+
+    def on_sudoku_grid3x3_moved(self, event: SudokuGrid3X3.Moved) -> None:
+        self.query_one(SimpleCounter).increment()
+        self.autosave.record(event.index, event.digit, self.query_one(CustomTimer).spended_time())
+
+    def on_sudoku_grid3x3_notes_changed(self, event: SudokuGrid3X3.NotesChanged) -> None:
+        self.autosave.record_notes(event.index, event.notes, self.query_one(CustomTimer).spended_time())
+
+    def on_sudoku_grid3x3_solved(self, event: SudokuGrid3X3.Solved) -> None:
+        timer = self.query_one(CustomTimer)
+        timer.stop_timer()
+        self.recorder.record(replay.SOLVED)
+        self.save_replay()
+        if event.assisted:
+            self.autosave.discard()
+            self.notify("Solved by the solver, no leader board entry this time.")
+            return
+        self.leaderboard.record(
+            self.difficulty, timer.spended_time(), self.query_one(SimpleCounter).value
+        )
+        self.autosave.discard()
+        self.notify("Solved! Your time is on the leader board.")
+
+    def on_line_grid_moved(self) -> None:
+        self.query_one(SimpleCounter).increment()
+
+    def on_line_grid_solved(self) -> None:
+        self.query_one(CustomTimer).stop_timer()
+        self.notify("Solved!")
+
+    def action_toggle_perf(self) -> None:
+        self.query_one(PerfOverlay).toggle()
+
+    @on(CustomButton.Clicked, '#resume')
+    async def handle_resume(self) -> None:
+        state = self.autosave.resume()
+        if state is None:
+            self.notify("The saved game could not be read!", severity="error")
+            self.load_home_screen()
+        else:
+            await self.load_game_screen(state.difficulty, state)
+
+    @on(CustomButton.Clicked, '#last-replay')
+    async def handle_last_replay(self) -> None:
+        await self.load_replay_screen()
+
+    @on(CustomButton.Clicked, '#leader-board')
+    async def handle_leader_board(self) -> None:
+        await self.load_leaderboard_screen()
+
+    @on(Select.Changed, '#leaderboard-difficulty')
+    def handle_leaderboard_difficulty(self) -> None:
+        self.leaderboard_pages = [None]
+        self.show_leaderboard_page()
+
+    @on(CustomButton.Clicked, '#leaderboard-next')
+    def handle_leaderboard_next(self) -> None:
+        if self._last_leaderboard_entry is not None:
+            self.leaderboard_pages.append(self._last_leaderboard_entry)
+            self.show_leaderboard_page()
+
+    @on(CustomButton.Clicked, '#leaderboard-previous')
+    def handle_leaderboard_previous(self) -> None:
+        if len(self.leaderboard_pages) > 1:
+            self.leaderboard_pages.pop()
+            self.show_leaderboard_page()
+
     @on(CustomButton.Clicked, '#new-game')
     def handle_new_game(self) -> None:
         self.load_choose_difficulty_screen()
 
+    @on(CustomButton.Clicked, '#daily')
+    async def handle_daily(self) -> None:
+        day, level, puzzle = self.daily.get()
+        notice = f"Daily puzzle for {day:%A, %d %B} ({level})"
+        if puzzle is None:
+            await self.load_preparing_screen()
+            self.load_when_ready(level, partial(self.daily.fetch, self.pool.submit, day), notice)
+        else:
+            await self.load_game_screen(level, puzzle=puzzle)
+            self.notify(notice)
+
+    @on(CustomButton.Clicked, '#start-game')
+    async def handle_start_game(self) -> None:
+        select = self.query_one('#difficulty', Select)
+        difficulty = DEFAULT_DIFFICULTY if select.is_blank() else select.value
+        await self.load_game_screen(difficulty, box=self.query_one('#grid-size', Select).value)
+
     @on(CustomButton.Clicked, '#back-to-home')
     def handle_back_to_home(self) -> None:
+        self.workers.cancel_group(self, 'puzzle')
+        self.close_game()
         self.load_home_screen()
 
     @on(CustomButton.Clicked, '#quit')
     def handle_quit(self) -> None:
+        self.close_game()
         self.exit()
 
 
 if __name__ == "__main__":
-    Main().run()
+    # --profile PATH writes a cProfile capture of the session (UI thread only)
+    # for pstats or snakeviz; --probe times the hot paths from the start
+    # and prints their latencies on exit.
+    if "--probe" in sys.argv:
+        import probe
+
+        probe.enable()
+    if "--profile" in sys.argv:
+        import cProfile
+
+        profile_path = sys.argv[sys.argv.index("--profile") + 1]
+        with cProfile.Profile() as profiler:
+            Main().run()
+        profiler.dump_stats(profile_path)
+    else:
+        Main().run()
+    if "--startup-report" in sys.argv:
+        print(startup.report())
+    if "--probe" in sys.argv:
+        print(probe.report())
 
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+# Everything the game keeps between runs lives here; PYSUDOKU_HOME lets
+# benchmarks and throwaway sessions point somewhere else.
+DATA_DIR = Path(os.environ.get("PYSUDOKU_HOME", Path.home() / ".pysudoku"))
+
+
+def data_path(name: str) -> Path:
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return DATA_DIR / name
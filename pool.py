@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from queue import Empty, Full, Queue
+from time import monotonic
+
+from bank import PuzzleBank
+from paths import data_path
+from rules import LEVELS
+
+DIFFICULTIES = LEVELS
+DEFAULT_DIFFICULTY = "Medium"
+
+# Seconds a blocking take() waits for the filler before generating in place
+WAIT = 10.0
+
+Board = list[list[int | None]]
+
+
+def encode(board: Board) -> str:
+    return "".join(str(digit or 0) for row in board for digit in row)
+
+
+def decode(puzzle: str) -> Board:
+    return [
+        [int(ch) or None for ch in puzzle[row * 9:row * 9 + 9]]
+        for row in range(9)
+    ]
+
+
+class PuzzlePool:
+    """Keeps a few ready-made puzzles per difficulty so starting a game is a queue pop.
+
+    A daemon thread tops the queues up whenever one is taken from, handing the
+    actual generation to a worker process so it never competes with the UI
+    for the GIL. Puzzles imported into the bank are used before generating
+    any. The spare puzzles are written to disk on `save` so the next run starts warm.
+    """
+
+    def __init__(self, size: int = 8, path: Path | None = None, bank: PuzzleBank | None = None) -> None:
+        self.size = size
+        self.path = path or data_path("pool.json")
+        # Imported puzzles are preferred over generating new ones
+        self.bank = bank or PuzzleBank()
+        self.queues: dict[str, Queue[str]] = {
+            difficulty: Queue(maxsize=size) for difficulty in DIFFICULTIES
+        }
+        self.hits = 0
+        self.misses = 0
+        # How long the first take() took to hand over a board
+        self.time_to_first_board: float | None = None
+        self._asked: float | None = None
+        # The level a blocking take() is waiting on, filled before the others
+        self._awaited: str | None = None
+        self._wanted = threading.Event()
+        self._stopped = threading.Event()
+        self._filler: threading.Thread | None = None
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def stats(self) -> dict[str, float | int | None]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "time_to_first_board": self.time_to_first_board,
+            **{name: queue.qsize() for name, queue in self.queues.items()},
+        }
+
+    def start(self, fill: bool = True) -> PuzzlePool:
+        """Load the spare puzzles and start the filler.
+
+        With `fill=False` the filler stays asleep until `wake` is called, so
+        the worker process does not compete with the first paint.
+        """
+        self.load()
+        self._executor = ProcessPoolExecutor(1, mp_context=get_context("spawn"))
+        self._filler = threading.Thread(
+            target=self._fill, name="puzzle-pool", daemon=True
+        )
+        self._filler.start()
+        if fill:
+            self.wake()
+        return self
+
+    def wake(self) -> None:
+        self._wanted.set()
+
+    def submit(self, fn, *args) -> Future:
+        """Run `fn` in the pool's worker process, between the puzzles it generates."""
+        return self._executor.submit(fn, *args)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wanted.set()
+        if self._executor is not None:
+            # Do not make quitting wait for a puzzle nobody will play: queued
+            # jobs are dropped and the one in flight finishes on its own
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._filler is not None:
+            self._filler.join(timeout=1)
+        self.save()
+
+    def take(self, difficulty: str = DEFAULT_DIFFICULTY, block: bool = True) -> str | None:
+        """A spare puzzle, else an imported one, else the filler's next one.
+
+        With `block=False` a miss returns None instead of waiting, so the UI
+        thread can hand the wait to a worker. A blocking take that waits
+        longer than WAIT seconds generates the puzzle itself.
+        """
+        if self._asked is None:
+            self._asked = monotonic()
+        self._wanted.set()
+        try:
+            puzzle = self.queues[difficulty].get_nowait()
+            self.hits += 1
+        except Empty:
+            puzzle = self.bank.sample(difficulty)
+            if puzzle is None:
+                if not block:
+                    return None
+                self._awaited = difficulty
+                try:
+                    puzzle = self.queues[difficulty].get(timeout=WAIT)
+                except Empty:
+                    from generator import generate
+
+                    puzzle = generate(difficulty)
+                finally:
+                    self._awaited = None
+            self.misses += 1
+        if self.time_to_first_board is None:
+            self.time_to_first_board = monotonic() - self._asked
+        return puzzle
+
+    def load(self) -> None:
+        try:
+            spare = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        for difficulty, puzzles in spare.items():
+            queue = self.queues.get(difficulty)
+            if queue is None:
+                continue
+            for puzzle in puzzles:
+                try:
+                    queue.put_nowait(puzzle)
+                except Full:
+                    break
+
+    def save(self) -> None:
+        spare = {
+            difficulty: list(queue.queue)
+            for difficulty, queue in self.queues.items()
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(spare))
+        os.replace(tmp, self.path)
+
+    def _fill(self) -> None:
+        self._wanted.wait()
+        # Imported on the first wake so it stays off the startup path
+        from generator import generate
+
+        while not self._stopped.is_set():
+            self._wanted.wait()
+            self._wanted.clear()
+            # The emptiest level first, so every level gets a spare before any
+            # gets a second, but a level that a take() is waiting on jumps ahead
+            while not self._stopped.is_set():
+                hungry = [name for name, queue in self.queues.items() if not queue.full()]
+                if not hungry:
+                    break
+                difficulty = min(
+                    hungry, key=lambda name: (name != self._awaited, self.queues[name].qsize())
+                )
+                try:
+                    puzzle = (
+                        self.bank.sample(difficulty)
+                        or self._executor.submit(generate, difficulty).result()
+                    )
+                except (CancelledError, RuntimeError):
+                    # The executor was shut down underneath us by stop()
+                    return
+                self.queues[difficulty].put(puzzle)
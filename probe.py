@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from functools import wraps
+from importlib.abc import Loader, MetaPathFinder
+from math import log2
+from time import perf_counter
+from types import ModuleType
+
+# What gets timed: module, class (None for module functions), attributes.
+# 9x9 puzzles are generated in the pool's worker process, so the UI side of
+# that is PuzzlePool.take; generator.generate itself is left alone because
+# the pool pickles it by reference. App._display runs once per frame Textual
+# writes, so it doubles as the frame counter.
+HOOKS = (
+    ("grid", "SudokuGrid3X3", ("on_key", "move_selection", "select_cell", "select_neighbours", "place_digit")),
+    ("linegrid", "LineGrid", ("on_key", "select", "place_digit")),
+    ("pool", "PuzzlePool", ("take",)),
+    ("daily", "DailyPuzzles", ("get",)),
+    ("generator", None, ("generate_grid",)),
+    ("textual.app", "App", ("_display",)),
+)
+FRAME = "App._display"
+
+# Latencies go in quarter-octave buckets from one microsecond up, each about
+# 19% wide, so a histogram is a fixed list of counts however long it runs.
+STEPS_PER_OCTAVE = 4
+BUCKETS = 128
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        micros = seconds * 1e6
+        bucket = int(log2(micros) * STEPS_PER_OCTAVE) + 1 if micros >= 1 else 0
+        self.counts[min(bucket, BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """The upper edge of the bucket holding the q-th percentile, in seconds."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(2 ** (bucket / STEPS_PER_OCTAVE) / 1e6, self.max)
+        return self.max
+
+
+histograms: dict[str, Histogram] = {}
+_installed: list[tuple[object, str, object]] = []
+# Hooks on modules nobody has imported yet, keyed by module name
+_waiting: dict[str, tuple[str | None, tuple[str, ...]]] = {}
+
+
+def enabled() -> bool:
+    return bool(_installed or _waiting)
+
+
+def _timed(name: str, function):
+    histogram = histograms.setdefault(name, Histogram())
+    if asyncio.iscoroutinefunction(function):
+        @wraps(function)
+        async def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                histogram.add(perf_counter() - started)
+    else:
+        @wraps(function)
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.add(perf_counter() - started)
+    return timed
+
+
+def _hook(module: ModuleType, class_name: str | None, attributes: tuple[str, ...]) -> None:
+    owner = module if class_name is None else getattr(module, class_name)
+    for attribute in attributes:
+        original = vars(owner)[attribute]
+        name = f"{class_name or module.__name__}.{attribute}"
+        _installed.append((owner, attribute, original))
+        setattr(owner, attribute, _timed(name, original))
+
+
+class _Finder(MetaPathFinder):
+    """Hooks a waiting module as soon as its first import has run it."""
+
+    def find_spec(self, name, path=None, target=None):
+        if name not in _waiting:
+            return None
+        for finder in sys.meta_path:
+            if finder is not self and hasattr(finder, "find_spec"):
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+        else:
+            return None
+        loader = spec.loader
+        spec.loader = _Loader(loader)
+        return spec
+
+
+class _Loader(Loader):
+    def __init__(self, loader: Loader) -> None:
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        # The module keeps its own loader, for tracebacks and reloads
+        module.__loader__ = module.__spec__.loader = self.loader
+        self.loader.exec_module(module)
+        hook = _waiting.pop(module.__name__, None)
+        if hook is not None:
+            _hook(module, *hook)
+        if not _waiting and _finder in sys.meta_path:
+            sys.meta_path.remove(_finder)
+
+
+_finder = _Finder()
+
+
+def enable() -> None:
+    """Wrap every hooked function with a timer, starting from empty histograms.
+
+    The wrappers are swapped in and out of the classes and modules themselves,
+    so while disabled the hot paths run their original code untouched. Modules
+    that are not loaded yet are hooked when something first imports them,
+    rather than imported here.
+    """
+    if enabled():
+        return
+    histograms.clear()
+    for module_name, class_name, attributes in HOOKS:
+        module = sys.modules.get(module_name)
+        if module is None:
+            _waiting[module_name] = (class_name, attributes)
+        else:
+            _hook(module, class_name, attributes)
+    if _waiting:
+        sys.meta_path.insert(0, _finder)
+
+
+def disable() -> None:
+    if _finder in sys.meta_path:
+        sys.meta_path.remove(_finder)
+    _waiting.clear()
+    while _installed:
+        owner, attribute, original = _installed.pop()
+        setattr(owner, attribute, original)
+
+
+def report() -> str:
+    lines = [f"{'':<32} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"]
+    for name, histogram in sorted(histograms.items()):
+        if histogram.count:
+            lines.append(
+                f"{name:<32} {histogram.count:>7} {histogram.percentile(50) * 1000:>8.2f} "
+                f"{histogram.percentile(99) * 1000:>8.2f} {histogram.max * 1000:>8.2f}"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+
+from bank import PuzzleBank
+from board import CELLS, find_conflicts
+from logic import LEVELS, grade
+from solver import count_solutions
+
+# Both formats hold one puzzle per line. "line" is the loose 81-character
+# form most collections use: any of BLANKS for an empty cell, anything after
+# the puzzle (ratings, comments) ignored, '#' lines skipped. "sdm" is strict:
+# exactly 81 digits with 0 for an empty cell.
+FORMATS = ("line", "sdm")
+BLANKS = ".0-*_"
+BLANK_OUT = {"line": ".", "sdm": "0"}
+
+# Puzzles per task handed to a worker, and tasks in flight per worker.
+CHUNK = 500
+AHEAD = 2
+
+
+def parse(line: str, fmt: str) -> str | None:
+    """The puzzle on `line` as 81 digits with 0 for blanks, or None if it is not one."""
+    if fmt == "sdm":
+        token = line.strip()
+        if len(token) != CELLS or not token.isdigit():
+            return None
+        return token
+    token = line.split(maxsplit=1)[0]
+    if len(token) != CELLS:
+        return None
+    digits = []
+    for ch in token:
+        if ch in BLANKS:
+            digits.append("0")
+        elif "1" <= ch <= "9":
+            digits.append(ch)
+        else:
+            return None
+    return "".join(digits)
+
+
+def read(lines: Iterable[str], fmt: str) -> Iterator[str | None]:
+    """Every puzzle line parsed, None standing in for a malformed one."""
+    for line in lines:
+        if not line.strip() or line.startswith("#"):
+            continue
+        yield parse(line, fmt)
+
+
+def check(puzzle: str | None) -> str:
+    """The level of a valid puzzle, otherwise why it was rejected."""
+    if puzzle is None:
+        return "malformed"
+    digits = bytes(map(int, puzzle))
+    if find_conflicts(digits):
+        return "conflicting givens"
+    solutions = count_solutions(digits, 2)
+    if solutions != 1:
+        return "no solution" if not solutions else "multiple solutions"
+    return grade(digits)[0]
+
+
+def check_chunk(puzzles: list[str | None]) -> list[str]:
+    return [check(puzzle) for puzzle in puzzles]
+
+
+def checked(puzzles: Iterator[str | None], workers: int) -> Iterator[tuple[str | None, str]]:
+    """Check puzzles in worker processes, in order, with a bounded number of chunks in flight."""
+    with ProcessPoolExecutor(workers, mp_context=get_context("spawn")) as executor:
+        pending: deque = deque()
+        while True:
+            chunk = list(islice(puzzles, CHUNK))
+            if chunk:
+                pending.append((chunk, executor.submit(check_chunk, chunk)))
+            if pending and (not chunk or len(pending) >= AHEAD * workers):
+                done, future = pending.popleft()
+                yield from zip(done, future.result())
+            if not chunk and not pending:
+                return
+
+
+def import_files(paths: list[str], fmt: str, bank: PuzzleBank, workers: int) -> Counter[str]:
+    verdicts: Counter[str] = Counter()
+    with bank.writer() as writer:
+        for path in paths:
+            with (sys.stdin if path == "-" else open(path)) as file:
+                for puzzle, verdict in checked(read(file, fmt), workers):
+                    verdicts[verdict] += 1
+                    if verdict in LEVELS:
+                        writer.write(verdict, puzzle)
+    return verdicts
+
+
+def export(levels: Iterable[str], fmt: str, bank: PuzzleBank, output: TextIO) -> int:
+    written = 0
+    for level in levels:
+        for puzzle in bank.puzzles(level):
+            output.write(puzzle.replace("0", BLANK_OUT[fmt]) + "\n")
+            written += 1
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Import, export and sample PySudoku puzzle banks")
+    parser.add_argument("--bank", type=Path, help="bank directory (default: the game's own)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="validate, grade and add puzzles to the bank")
+    importer.add_argument("files", nargs="+", metavar="FILE", help="puzzle files, - for stdin")
+    importer.add_argument("--format", choices=FORMATS, default="line")
+    importer.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    exporter = commands.add_parser("export", help="write the bank out one puzzle per line")
+    exporter.add_argument("levels", nargs="*", metavar="LEVEL", help=f"any of {', '.join(LEVELS)} (default: all)")
+    exporter.add_argument("--format", choices=FORMATS, default="line")
+    exporter.add_argument("--output", "-o", help="file to write instead of stdout")
+
+    sampler = commands.add_parser("sample", help="print a random puzzle of one level")
+    sampler.add_argument("level", choices=LEVELS)
+
+    seeder = commands.add_parser("seeded", help="print the puzzle a seed generates, the same on every machine")
+    seeder.add_argument("level", choices=LEVELS)
+    seeder.add_argument("seed")
+
+    commands.add_parser("stats", help="count the puzzles of each level")
+
+    args = parser.parse_args(argv)
+    bank = PuzzleBank(args.bank)
+
+    if args.command == "import":
+        verdicts = import_files(args.files, args.format, bank, args.workers)
+        for verdict, count in sorted(verdicts.items(), key=lambda item: (item[0] not in LEVELS, item[0])):
+            print(f"{verdict:<20} {count:>10}")
+    elif args.command == "export":
+        for level in args.levels:
+            if level not in LEVELS:
+                parser.error(f"unknown level {level!r}")
+        if args.output:
+            with open(args.output, "w") as output:
+                export(args.levels or LEVELS, args.format, bank, output)
+        else:
+            export(args.levels or LEVELS, args.format, bank, sys.stdout)
+    elif args.command == "sample":
+        puzzle = bank.sample(args.level)
+        if puzzle is None:
+            sys.exit(f"the bank has no {args.level} puzzles")
+        print(puzzle)
+    elif args.command == "seeded":
+        from generator import seeded
+
+        print(seeded(args.level, args.seed))
+    else:
+        for level in LEVELS:
+            print(f"{level:<20} {bank.count(level):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import struct
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from random import Random
+from time import monotonic, time_ns
+from typing import TYPE_CHECKING, Callable, NamedTuple
+
+from paths import data_path
+from rules import CELLS, LEVELS
+
+if TYPE_CHECKING:
+    from board import Board
+
+# File layout: a header, the givens as a bitmask and the starting digits,
+# then every event as (milliseconds since the start, packed event), then the
+# keyframes. An event packs its kind, cell and digit into 16 bits.
+MAGIC = b"PSRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBxxII")  # magic, version, level, events, keyframes
+GIVENS_BYTES = (CELLS + 7) // 8
+EVENT = struct.Struct("<IH")
+KEYFRAME = struct.Struct(f"<IHBB{CELLS}s")  # position, selected, paused, conflicts, digits
+SELECT, DIGIT, PAUSE, RESUME, SOLVED = range(5)
+NO_CELL = 0xFFFF
+
+# Snapshot the live board every this many events, so seeking replays at
+# most this many events past a bisected keyframe.
+KEYFRAME_EVERY = 64
+
+# Replays kept on disk; saving one more deletes the oldest.
+KEEP_REPLAYS = 100
+
+
+def pack(kind: int, cell: int = 0, digit: int = 0) -> int:
+    return kind << 12 | cell << 4 | digit
+
+
+def unpack(event: int) -> tuple[int, int, int]:
+    return event >> 12, event >> 4 & 0xFF, event & 0xF
+
+
+class Keyframe(NamedTuple):
+    # The state after the first `position` events
+    position: int
+    selected: int | None
+    paused: bool
+    conflicts: int
+    digits: bytes
+
+
+class Frame(NamedTuple):
+    position: int
+    digits: bytes
+    selected: int | None
+    paused: bool
+
+
+class Replay:
+    """A recorded game: its starting board, timestamped events and keyframes.
+
+    `frame` finds the last keyframe at or before a position by bisection and
+    replays only the events after it, so any point of a game of any length
+    is a seek away.
+    """
+
+    def __init__(
+        self, difficulty: str, givens: bytes, start: bytes,
+        times: array, events: array, keyframes: list[Keyframe],
+    ) -> None:
+        from board import Board
+
+        self.difficulty = difficulty
+        self.givens = givens
+        self.start = start
+        self.times = times
+        self.events = events
+        self.keyframes = [Keyframe(0, None, False, Board(start, givens).conflicts, start), *keyframes]
+        self.positions = [keyframe.position for keyframe in self.keyframes]
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    @property
+    def duration(self) -> int:
+        return self.times[-1] if self.times else 0
+
+    def position_at(self, ms: float) -> int:
+        """How many events have happened `ms` milliseconds into the game."""
+        return bisect_right(self.times, ms)
+
+    def frame(self, position: int) -> Frame:
+        keyframe = self.keyframes[bisect_right(self.positions, position) - 1]
+        digits = bytearray(keyframe.digits)
+        selected, paused = keyframe.selected, keyframe.paused
+        for event in self.events[keyframe.position:position]:
+            kind, cell, digit = unpack(event)
+            if kind == SELECT:
+                selected = cell
+            elif kind == DIGIT:
+                digits[cell] = digit
+            elif kind == PAUSE or kind == RESUME:
+                paused = kind == PAUSE
+        return Frame(position, bytes(digits), selected, paused)
+
+    def seek(self, ms: float) -> Frame:
+        return self.frame(self.position_at(ms))
+
+    def check(self) -> list[str]:
+        """Replay the digits through a fresh Board and compare with what the game recorded.
+
+        Every keyframe holds the live board's digits and conflict count, and a
+        solved event must leave the board solved, so a recorded game doubles
+        as a regression fixture for the board logic.
+        """
+        from board import Board
+
+        problems = []
+        board = Board(self.start, self.givens)
+        keyframes = iter(self.keyframes[1:])
+        keyframe = next(keyframes, None)
+        for position, event in enumerate(self.events, 1):
+            kind, cell, digit = unpack(event)
+            if kind == DIGIT:
+                board.place(cell, digit)
+            elif kind == SOLVED and not board.is_solved():
+                problems.append(f"event {position}: recorded as solved, but the board is not")
+            if keyframe is not None and keyframe.position == position:
+                if bytes(board.digits) != keyframe.digits:
+                    problems.append(f"event {position}: digits differ from the keyframe")
+                if board.conflicts != keyframe.conflicts:
+                    problems.append(
+                        f"event {position}: {board.conflicts} conflicts, the game had {keyframe.conflicts}"
+                    )
+                keyframe = next(keyframes, None)
+        return problems
+
+    def to_bytes(self) -> bytes:
+        givens = bytearray(GIVENS_BYTES)
+        for index, given in enumerate(self.givens):
+            if given:
+                givens[index >> 3] |= 1 << (index & 7)
+        return b"".join((
+            HEADER.pack(MAGIC, VERSION, LEVELS.index(self.difficulty), len(self.events), len(self.keyframes) - 1),
+            givens,
+            self.start,
+            b"".join(EVENT.pack(at, event) for at, event in zip(self.times, self.events)),
+            b"".join(
+                KEYFRAME.pack(
+                    keyframe.position, NO_CELL if keyframe.selected is None else keyframe.selected,
+                    keyframe.paused, keyframe.conflicts, keyframe.digits,
+                )
+                for keyframe in self.keyframes[1:]
+            ),
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Replay:
+        magic, version, level, count, keyframe_count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a PySudoku replay")
+        offset = HEADER.size
+        givens = bytes(data[offset + (index >> 3)] >> (index & 7) & 1 for index in range(CELLS))
+        offset += GIVENS_BYTES
+        start = bytes(data[offset:offset + CELLS])
+        offset += CELLS
+        times, events = array("L"), array("H")
+        for at, event in EVENT.iter_unpack(data[offset:offset + count * EVENT.size]):
+            times.append(at)
+            events.append(event)
+        offset += count * EVENT.size
+        keyframes = [
+            Keyframe(position, None if selected == NO_CELL else selected, bool(paused), conflicts, digits)
+            for position, selected, paused, conflicts, digits
+            in KEYFRAME.iter_unpack(data[offset:offset + keyframe_count * KEYFRAME.size])
+        ]
+        return cls(LEVELS[level], givens, start, times, events, keyframes)
+
+    @classmethod
+    def load(cls, path: Path) -> Replay:
+        return cls.from_bytes(path.read_bytes())
+
+
+class Recorder:
+    """Records a game as it is played, snapshotting the live board every KEYFRAME_EVERY events."""
+
+    def __init__(self, difficulty: str, board: Board, clock: Callable[[], float] = monotonic) -> None:
+        self.difficulty = difficulty
+        self.board = board
+        self.clock = clock
+        self.started = clock()
+        self.givens = bytes(board.givens)
+        self.start = bytes(board.digits)
+        self.times = array("L")
+        self.events = array("H")
+        self.keyframes: list[Keyframe] = []
+        self.selected: int | None = None
+        self.paused = False
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def record(self, kind: int, cell: int = 0, digit: int = 0) -> None:
+        if kind == SELECT:
+            self.selected = cell
+        elif kind == PAUSE or kind == RESUME:
+            self.paused = kind == PAUSE
+        self.times.append(int((self.clock() - self.started) * 1000))
+        self.events.append(pack(kind, cell, digit))
+        if not len(self.events) % KEYFRAME_EVERY:
+            self.keyframes.append(Keyframe(
+                len(self.events), self.selected, self.paused, self.board.conflicts, bytes(self.board.digits)
+            ))
+
+    def replay(self) -> Replay:
+        return Replay(self.difficulty, self.givens, self.start, self.times, self.events, self.keyframes)
+
+    def save(self, directory: Path | None = None) -> Path:
+        directory = directory or data_path("replays")
+        directory.mkdir(parents=True, exist_ok=True)
+        data = self.replay().to_bytes()
+        # Named by the millisecond; a taken name moves on to the next
+        # millisecond rather than overwrite it
+        stamp = time_ns() // 1_000_000
+        while True:
+            path = directory / f"{stamp}.psr"
+            try:
+                with open(path, "xb") as file:
+                    file.write(data)
+                break
+            except FileExistsError:
+                stamp += 1
+        for old in saved(directory)[:-KEEP_REPLAYS]:
+            old.unlink(missing_ok=True)
+        return path
+
+
+def saved(directory: Path | None = None) -> list[Path]:
+    """Every saved replay, oldest first."""
+    directory = directory or data_path("replays")
+    return sorted(
+        (path for path in directory.glob("*.psr") if path.stem.isdigit()),
+        key=lambda path: int(path.stem),
+    )
+
+
+def latest(directory: Path | None = None) -> Path | None:
+    replays = saved(directory)
+    return replays[-1] if replays else None
+
+
+def synthetic(puzzle: str, solution: bytes, seed: int = 0, mistakes: float = 0.15) -> Replay:
+    """A scripted game for fixtures and benchmarks: every empty cell gets
+    selected and filled, some of them wrongly first and corrected later."""
+    from board import Board
+
+    rng = Random(seed)
+    now = [0.0]
+    board = Board(bytes(map(int, puzzle)))
+    recorder = Recorder("Medium", board, clock=lambda: now[0])
+    empties = [index for index in range(CELLS) if not board.digits[index]]
+    rng.shuffle(empties)
+    wrong = []
+    for index in empties:
+        now[0] += rng.uniform(0.3, 4.0)
+        recorder.record(SELECT, index)
+        digit = solution[index]
+        if rng.random() < mistakes:
+            digit = rng.choice([other for other in range(1, 10) if other != digit])
+            wrong.append(index)
+        now[0] += rng.uniform(0.2, 2.0)
+        board.place(index, digit)
+        recorder.record(DIGIT, index, digit)
+        if rng.random() < 0.02:
+            recorder.record(PAUSE)
+            now[0] += rng.uniform(5, 60)
+            recorder.record(RESUME)
+    for index in wrong:
+        now[0] += rng.uniform(0.3, 4.0)
+        recorder.record(SELECT, index)
+        board.place(index, solution[index])
+        recorder.record(DIGIT, index, solution[index])
+    recorder.record(SOLVED)
+    return recorder.replay()
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Recorded games as regression fixtures: python replay.py FILE...
+    if not sys.argv[1:]:
+        sys.exit("usage: python replay.py FILE...")
+    failed = False
+    for name in sys.argv[1:]:
+        problems = Replay.load(Path(name)).check()
+        print(f"{name}: {'ok' if not problems else 'FAILED'}")
+        for problem in problems:
+            print(f"  {problem}")
+        failed = failed or bool(problems)
+    sys.exit(failed)
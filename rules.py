@@ -0,0 +1,4 @@
+# The shape of the standard game, for modules on the startup path that must
+# not pull in the board model or the solver just to know it.
+LEVELS = ("Easy", "Medium", "Hard")
+CELLS = 81
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import NamedTuple
+
+from paths import data_path
+from rules import CELLS, LEVELS
+
+# Snapshot layout: header, a bitmask of the givens, every digit as a nibble,
+# then one 9-bit pencil mark mask per cell stored as uint16.
+MAGIC = b"PSDK"
+VERSION = 1
+HEADER = struct.Struct("<4sBBIId")  # magic, version, level, generation, moves, elapsed
+GIVENS_BYTES = (CELLS + 7) // 8
+DIGITS_BYTES = (CELLS + 1) // 2
+
+# Journal layout: a header naming the snapshot generation it extends, then
+# fixed-size records of (cell, kind, value, elapsed).
+JOURNAL_HEADER = struct.Struct("<4sI")
+RECORD = struct.Struct("<BBHf")
+DIGIT, NOTES = 0, 1
+
+# Fold the journal into a fresh snapshot after this many records.
+COMPACT_EVERY = 256
+
+
+class SaveState(NamedTuple):
+    difficulty: str
+    givens: bytes
+    digits: bytes
+    notes: tuple[int, ...]
+    elapsed: float
+    moves: int
+
+
+def encode(state: SaveState, generation: int = 0) -> bytes:
+    givens = bytearray(GIVENS_BYTES)
+    for index, given in enumerate(state.givens):
+        if given:
+            givens[index >> 3] |= 1 << (index & 7)
+    digits = bytearray(DIGITS_BYTES)
+    for index, digit in enumerate(state.digits):
+        digits[index >> 1] |= digit << (4 * (index & 1))
+    return b"".join((
+        HEADER.pack(MAGIC, VERSION, LEVELS.index(state.difficulty), generation, state.moves, state.elapsed),
+        givens,
+        digits,
+        array("H", state.notes).tobytes(),
+    ))
+
+
+def decode(data: bytes) -> tuple[SaveState, int]:
+    magic, version, level, generation, moves, elapsed = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a PySudoku save file")
+    offset = HEADER.size
+    givens = bytes(data[offset + (index >> 3)] >> (index & 7) & 1 for index in range(CELLS))
+    offset += GIVENS_BYTES
+    digits = bytes(data[offset + (index >> 1)] >> (4 * (index & 1)) & 0xF for index in range(CELLS))
+    offset += DIGITS_BYTES
+    notes = array("H")
+    notes.frombytes(data[offset:offset + 2 * CELLS])
+    return SaveState(LEVELS[level], givens, digits, tuple(notes), elapsed, moves), generation
+
+
+def _replace(path: Path, data: bytes) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
+
+
+class Autosave:
+    """Crash-safe autosave: a compact snapshot plus an append-only move journal.
+
+    Every move appends an 8-byte record to the journal. Every COMPACT_EVERY
+    records the state is rewritten as a new snapshot by atomic rename and the
+    journal restarts. The journal header carries the snapshot generation, so a
+    crash between the two renames never replays moves twice.
+    """
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self.snapshot_path = directory / "save.bin" if directory else data_path("save.bin")
+        self.journal_path = self.snapshot_path.with_suffix(".journal")
+        self.generation = 0
+        self.journal = None
+        self.state: SaveState | None = None
+        self._digits = bytearray()
+        self._notes: list[int] = []
+        self._records = 0
+        self._elapsed = 0.0
+
+    def exists(self) -> bool:
+        return self.snapshot_path.exists()
+
+    def start(self, state: SaveState) -> None:
+        # Whatever journal is lying around belongs to another game
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.journal_path.unlink(missing_ok=True)
+        self.state = state
+        self._digits = bytearray(state.digits)
+        self._notes = list(state.notes)
+        self._elapsed = state.elapsed
+        self.compact(state.elapsed)
+
+    def load(self) -> SaveState | None:
+        try:
+            state, self.generation = decode(self.snapshot_path.read_bytes())
+        except (OSError, ValueError, struct.error):
+            return None
+        digits = bytearray(state.digits)
+        notes = list(state.notes)
+        elapsed, moves = state.elapsed, state.moves
+        try:
+            journal = self.journal_path.read_bytes()
+        except OSError:
+            journal = b""
+        if len(journal) >= JOURNAL_HEADER.size:
+            magic, generation = JOURNAL_HEADER.unpack_from(journal)
+            if magic == MAGIC and generation == self.generation:
+                # A torn trailing record from a crash is simply ignored
+                end = JOURNAL_HEADER.size + (len(journal) - JOURNAL_HEADER.size) // RECORD.size * RECORD.size
+                for cell, kind, value, elapsed in RECORD.iter_unpack(journal[JOURNAL_HEADER.size:end]):
+                    if kind == DIGIT:
+                        digits[cell] = value
+                        moves += 1
+                    else:
+                        notes[cell] = value
+        self.state = state._replace(digits=bytes(digits), notes=tuple(notes), elapsed=elapsed, moves=moves)
+        return self.state
+
+    def resume(self) -> SaveState | None:
+        state = self.load()
+        if state is not None:
+            self.start(state)
+        return state
+
+    def record(self, cell: int, digit: int, elapsed: float) -> None:
+        self._digits[cell] = digit
+        self.state = self.state._replace(moves=self.state.moves + 1)
+        self._append(cell, DIGIT, digit, elapsed)
+
+    def record_notes(self, cell: int, notes: int, elapsed: float) -> None:
+        self._notes[cell] = notes
+        self._append(cell, NOTES, notes, elapsed)
+
+    def _append(self, cell: int, kind: int, value: int, elapsed: float) -> None:
+        self.journal.write(RECORD.pack(cell, kind, value, elapsed))
+        self.journal.flush()
+        self._elapsed = elapsed
+        self._records += 1
+        if self._records >= COMPACT_EVERY:
+            self.compact(elapsed)
+
+    def compact(self, elapsed: float) -> None:
+        self.state = self.state._replace(
+            digits=bytes(self._digits), notes=tuple(self._notes), elapsed=elapsed
+        )
+        self.generation += 1
+        _replace(self.snapshot_path, encode(self.state, self.generation))
+        if self.journal is not None:
+            self.journal.close()
+        _replace(self.journal_path, JOURNAL_HEADER.pack(MAGIC, self.generation))
+        self.journal = open(self.journal_path, "ab")
+        self._records = 0
+
+    def close(self, elapsed: float | None = None) -> None:
+        if self.journal is None:
+            return
+        self.compact(self._elapsed if elapsed is None else elapsed)
+        self.journal.close()
+        self.journal = None
+
+    def discard(self) -> None:
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        for path in (self.snapshot_path, self.journal_path):
+            path.unlink(missing_ok=True)
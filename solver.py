@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from board import BOX_OF, CELLS, COL_OF, FULL, MAX_BOX, ROW_OF, SIZE, geometry_for
+
+# Candidate sets are masks with bit d-1 standing for digit d. The 9-bit ones
+# get a lookup table; bigger grids fall back to int.bit_count.
+POPCOUNT = tuple(bin(mask).count("1") for mask in range(FULL + 1))
+DIGIT_OF = {1 << (digit - 1): digit for digit in range(1, MAX_BOX ** 2 + 1)}
+
+
+class _BitCount:
+    # Indexable like POPCOUNT, so the hot loop keeps its fast tuple lookup on 9x9
+    __getitem__ = staticmethod(int.bit_count)
+
+BACKENDS = ("bitmask", "dlx")
+
+
+def solve(digits: Iterable[int], backend: str = "bitmask") -> bytes | None:
+    solutions = _search(digits, 1, backend)
+    return solutions[0] if solutions else None
+
+
+def count_solutions(digits: Iterable[int], limit: int = 2, backend: str = "bitmask") -> int:
+    return len(_search(digits, limit, backend))
+
+
+def is_unique(digits: Iterable[int], backend: str = "bitmask") -> bool:
+    return count_solutions(digits, 2, backend) == 1
+
+
+def is_solvable(digits: Iterable[int]) -> bool:
+    return bool(_bitmask_search(bytearray(digits), 1))
+
+
+def _search(digits: Iterable[int], limit: int, backend: str) -> list[bytes]:
+    digits = bytearray(digits)
+    if backend == "bitmask":
+        return _bitmask_search(digits, limit)
+    if backend == "dlx":
+        if len(digits) != CELLS:
+            raise ValueError("the dlx backend only solves 9x9 grids")
+        return _dlx_search(digits, limit)
+    raise ValueError(f"unknown solver backend {backend!r}, expected one of {BACKENDS}")
+
+
+def _bitmask_search(digits: bytearray, limit: int) -> list[bytes]:
+    shape = geometry_for(len(digits))
+    size, cells, full = shape.size, shape.cells, shape.full
+    row_of, col_of, box_of, units = shape.row_of, shape.col_of, shape.box_of, shape.units
+    popcount = POPCOUNT if size == SIZE else _BitCount()
+    rows = [0] * size
+    cols = [0] * size
+    boxes = [0] * size
+    for index, digit in enumerate(digits):
+        if digit:
+            bit = 1 << (digit - 1)
+            row, col, box = row_of[index], col_of[index], box_of[index]
+            if (rows[row] | cols[col] | boxes[box]) & bit:
+                return []
+            rows[row] |= bit
+            cols[col] |= bit
+            boxes[box] |= bit
+
+    empties = [index for index in range(cells) if not digits[index]]
+    solutions: list[bytes] = []
+
+    def search(remaining: int) -> bool:
+        if not remaining:
+            solutions.append(bytes(digits))
+            return len(solutions) >= limit
+
+        # Branch on the most constrained cell; a single candidate is a forced move.
+        masks = [0] * cells
+        best = -1
+        best_mask = 0
+        best_count = size + 1
+        for index in empties:
+            if digits[index]:
+                continue
+            mask = full & ~(rows[row_of[index]] | cols[col_of[index]] | boxes[box_of[index]])
+            count = popcount[mask]
+            if not count:
+                return False
+            masks[index] = mask
+            if count < best_count:
+                best, best_mask, best_count = index, mask, count
+                if count == 1:
+                    break
+
+        # Hidden singles: a digit with only one home left in a unit is forced too.
+        if best_count > 1:
+            for unit, placed in zip(units, (*rows, *cols, *boxes)):
+                once = twice = 0
+                for index in unit:
+                    twice |= once & masks[index]
+                    once |= masks[index]
+                if (once | placed) != full:
+                    return False
+                hidden = once & ~twice
+                if hidden:
+                    bit = hidden & -hidden
+                    for index in unit:
+                        if masks[index] & bit:
+                            best, best_mask = index, bit
+                            break
+                    break
+
+        row, col, box = row_of[best], col_of[best], box_of[best]
+        while best_mask:
+            bit = best_mask & -best_mask
+            best_mask ^= bit
+            digits[best] = DIGIT_OF[bit]
+            rows[row] |= bit
+            cols[col] |= bit
+            boxes[box] |= bit
+            if search(remaining - 1):
+                return True
+            rows[row] ^= bit
+            cols[col] ^= bit
+            boxes[box] ^= bit
+        digits[best] = 0
+        return False
+
+    search(len(empties))
+    return solutions
+
+
+# Dancing links over the standard 324-column exact-cover matrix: one column per
+# filled cell, row-digit, column-digit and box-digit constraint, one matrix row
+# per (cell, digit) choice. The node arrays are built once and copied per solve.
+_COLUMNS = 4 * CELLS
+
+
+def _choice_columns(index: int, digit: int) -> tuple[int, int, int, int]:
+    offset = digit - 1
+    return (
+        1 + index,
+        1 + CELLS + ROW_OF[index] * SIZE + offset,
+        1 + 2 * CELLS + COL_OF[index] * SIZE + offset,
+        1 + 3 * CELLS + BOX_OF[index] * SIZE + offset,
+    )
+
+
+def _build_links() -> tuple[list[int], ...]:
+    left = [(column - 1) % (_COLUMNS + 1) for column in range(_COLUMNS + 1)]
+    right = [(column + 1) % (_COLUMNS + 1) for column in range(_COLUMNS + 1)]
+    up = list(range(_COLUMNS + 1))
+    down = list(range(_COLUMNS + 1))
+    header = list(range(_COLUMNS + 1))
+    choice = [-1] * (_COLUMNS + 1)
+    size = [0] * (_COLUMNS + 1)
+
+    for index in range(CELLS):
+        for digit in range(1, SIZE + 1):
+            first = len(left)
+            for column in _choice_columns(index, digit):
+                node = len(left)
+                left.append(node - 1)
+                right.append(node + 1)
+                up.append(up[column])
+                down.append(column)
+                down[up[column]] = node
+                up[column] = node
+                header.append(column)
+                choice.append(index * SIZE + digit - 1)
+                size[column] += 1
+            left[first] = first + 3
+            right[first + 3] = first
+    return left, right, up, down, header, choice, size
+
+
+_LINKS = _build_links()
+# First node of every (cell, digit) matrix row, used to place the givens.
+_ROW_START = [_COLUMNS + 1 + 4 * choice for choice in range(CELLS * SIZE)]
+
+
+def _dlx_search(digits: bytearray, limit: int) -> list[bytes]:
+    left, right, up, down, header, choice, size = (list(links) for links in _LINKS)
+
+    def cover(column: int) -> None:
+        right[left[column]] = right[column]
+        left[right[column]] = left[column]
+        row = down[column]
+        while row != column:
+            node = right[row]
+            while node != row:
+                down[up[node]] = down[node]
+                up[down[node]] = up[node]
+                size[header[node]] -= 1
+                node = right[node]
+            row = down[row]
+
+    def uncover(column: int) -> None:
+        row = up[column]
+        while row != column:
+            node = left[row]
+            while node != row:
+                size[header[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                node = left[node]
+            row = up[row]
+        right[left[column]] = column
+        left[right[column]] = column
+
+    covered = bytearray(_COLUMNS + 1)
+    for index, digit in enumerate(digits):
+        if digit:
+            start = _ROW_START[index * SIZE + digit - 1]
+            for node in range(start, start + 4):
+                column = header[node]
+                if covered[column]:
+                    return []
+                covered[column] = 1
+                cover(column)
+
+    solutions: list[bytes] = []
+
+    def search() -> bool:
+        if right[0] == 0:
+            solutions.append(bytes(digits))
+            return len(solutions) >= limit
+
+        column = right[0]
+        best, best_size = column, size[column]
+        while column != 0 and best_size > 1:
+            if size[column] < best_size:
+                best, best_size = column, size[column]
+            column = right[column]
+        if not best_size:
+            return False
+
+        cover(best)
+        row = down[best]
+        while row != best:
+            index, offset = divmod(choice[row], SIZE)
+            digits[index] = offset + 1
+            node = right[row]
+            while node != row:
+                cover(header[node])
+                node = right[node]
+            done = search()
+            node = left[row]
+            while node != row:
+                uncover(header[node])
+                node = left[node]
+            if done:
+                break
+            row = down[row]
+        else:
+            uncover(best)
+            return False
+        uncover(best)
+        return True
+
+    search()
+    return solutions
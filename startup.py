@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from time import perf_counter
+
+# Imported first by main.py, so this is as close to interpreter start as we get.
+STARTED = perf_counter()
+
+marks: list[tuple[str, float]] = []
+
+
+def mark(stage: str) -> None:
+    marks.append((stage, perf_counter()))
+
+
+def report() -> str:
+    """Time spent in each stage since the previous mark, then the running total."""
+    lines = []
+    previous = STARTED
+    for stage, at in marks:
+        lines.append(f"{stage:<24} {(at - previous) * 1000:8.1f} ms {(at - STARTED) * 1000:8.1f} ms")
+        previous = at
+    return "\n".join(lines)
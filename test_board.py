@@ -0,0 +1,34 @@
+from random import Random
+
+import pytest
+
+from board import Board, find_conflicts, geometry
+
+
+@pytest.mark.parametrize(
+    ("box", "moves", "seed"),
+    [(3, 2_000, seed) for seed in range(4)] + [(2, 2_000, 0), (4, 500, 0), (5, 200, 0)],
+)
+def test_place_matches_brute_force(box, moves, seed):
+    # Board.place keeps errors, conflicts and candidates incrementally; after
+    # every random move they must agree with recomputing them from scratch.
+    rng = Random(seed)
+    shape = geometry(box)
+    board = Board([0] * shape.cells)
+    expected = set()
+    for _ in range(moves):
+        index = rng.randrange(shape.cells)
+        # Bias towards erasures and overwrites of filled cells
+        digit = 0 if rng.random() < 0.3 else rng.randint(1, shape.size)
+        changed = set(board.place(index, digit))
+        conflicts = find_conflicts(board.digits)
+        assert changed == expected ^ conflicts, (index, digit)
+        assert {i for i in range(shape.cells) if board.errors[i]} == conflicts
+        assert board.conflicts == len(conflicts)
+        assert board.candidates == [
+            0 if board.digits[i] else shape.full & ~sum(
+                {1 << (board.digits[p] - 1) for p in shape.peers[i] if board.digits[p]}
+            )
+            for i in range(shape.cells)
+        ]
+        expected = conflicts
@@ -0,0 +1,66 @@
+from history import History, pack, unpack
+
+
+def played(*moves):
+    # moves are (cell, old, new, clean)
+    history = History()
+    for move in moves:
+        history.push(*move)
+    return history
+
+
+def test_pack_round_trip():
+    assert unpack(pack(80, 9, 3)) == (80, 9, 3)
+    assert unpack(pack(624, 25, 17, 5), 5) == (624, 25, 17)
+
+
+def test_undo_redo_across_a_fork():
+    history = played((0, 0, 1, True), (1, 0, 2, True), (2, 0, 3, True))
+    assert list(history.undo()) == [(2, 0)]
+    assert list(history.undo()) == [(1, 0)]
+    assert list(history.redo()) == [(1, 2)]
+    # A new move drops the redo tail
+    history.push(5, 0, 7, True)
+    assert len(history) == 3
+    assert list(history.redo()) == []
+    assert list(history.undo()) == [(5, 0)]
+    assert list(history.redo()) == [(5, 7)]
+    assert history.clean == bytearray([1, 1, 1, 1])
+
+
+def test_undo_past_the_start_does_nothing():
+    history = played((0, 0, 1, True))
+    assert list(history.undo()) == [(0, 0)]
+    assert list(history.undo()) == []
+    assert history.cursor == 0
+
+
+def test_last_clean_on_a_clean_cursor():
+    history = played((0, 0, 1, True), (1, 0, 1, False), (1, 1, 2, True))
+    assert history.last_clean() == history.cursor == 3
+
+
+def test_last_clean_on_a_dirty_cursor():
+    history = played((0, 0, 1, True), (1, 0, 1, False), (2, 0, 1, False))
+    assert history.last_clean() == 1
+    # Only the states up to the cursor count, not the redo tail
+    list(history.undo())
+    history.push(3, 0, 4, False)
+    assert history.last_clean() == 1
+
+
+def test_last_clean_when_never_clean():
+    history = History(clean=False)
+    history.push(0, 0, 1, False)
+    assert history.last_clean() is None
+
+
+def test_steps_to_both_ways():
+    history = played((0, 0, 1, True), (1, 0, 2, True), (0, 1, 3, True))
+    assert list(history.steps_to(0)) == [(0, 1), (1, 0), (0, 0)]
+    assert history.cursor == 0
+    assert list(history.steps_to(3)) == [(0, 1), (1, 2), (0, 3)]
+    assert history.cursor == 3
+    # Targets out of range are clamped
+    assert list(history.steps_to(-5)) == [(0, 1), (1, 0), (0, 0)]
+    assert list(history.steps_to(99)) == [(0, 1), (1, 2), (0, 3)]
@@ -0,0 +1,30 @@
+import pytest
+
+from logic import walkthrough
+from solver import solve
+
+PUZZLES = {
+    "golden-nugget": "000000039000001005003050800008090006070002000100400000009080050020000600400700000",
+    "easter-monster": "100000002090400050006000700050903000000070000000850040700000600030009080002000001",
+    "ai-escargot": "100007090030020008009600500005300900010080002600004000300000010040000007007000300",
+}
+
+
+@pytest.mark.parametrize("puzzle", PUZZLES.values(), ids=PUZZLES.keys())
+def test_walkthrough_steps_outside_guesses_are_certain(puzzle):
+    digits = bytes(map(int, puzzle))
+    solution = solve(digits)
+    board = bytearray(digits)
+    guessed_wrong = 0
+    for step in walkthrough(digits):
+        if step.kind == "eliminate":
+            if step.depth:
+                guessed_wrong += step.digit == solution[step.index]
+            else:
+                assert step.digit != solution[step.index], step
+        elif step.kind == "place" and not step.depth:
+            assert step.digit == solution[step.index], step
+        board[step.index] = step.digit
+    assert bytes(board) == solution
+    # These puzzles need guessing, and a wrong guess eliminates true digits
+    assert guessed_wrong
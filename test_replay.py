@@ -0,0 +1,41 @@
+from random import Random
+
+import pytest
+
+from generator import generate
+from replay import DIGIT, PAUSE, RESUME, SELECT, Replay, synthetic, unpack
+from solver import solve
+
+
+@pytest.fixture(params=range(4))
+def replay(request):
+    puzzle = generate("Medium", Random(request.param))
+    return synthetic(puzzle, solve(bytes(map(int, puzzle))), request.param)
+
+
+def test_board_agrees_with_every_keyframe(replay):
+    assert replay.check() == []
+
+
+def test_seeking_matches_playing_through(replay):
+    digits = bytearray(replay.start)
+    selected, paused = None, False
+    states = [(bytes(digits), selected, paused)]
+    for event in replay.events:
+        kind, cell, digit = unpack(event)
+        if kind == SELECT:
+            selected = cell
+        elif kind == DIGIT:
+            digits[cell] = digit
+        elif kind in (PAUSE, RESUME):
+            paused = kind == PAUSE
+        states.append((bytes(digits), selected, paused))
+    rng = Random(0)
+    for position in [rng.randrange(len(states)) for _ in range(200)] + [0, len(replay)]:
+        assert replay.frame(position)[1:] == states[position], position
+
+
+def test_bytes_round_trip(replay):
+    again = Replay.from_bytes(replay.to_bytes())
+    assert (again.difficulty, again.givens, again.start) == (replay.difficulty, replay.givens, replay.start)
+    assert (again.times, again.events, again.keyframes) == (replay.times, replay.events, replay.keyframes)
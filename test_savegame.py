@@ -0,0 +1,60 @@
+import pytest
+
+from savegame import COMPACT_EVERY, JOURNAL_HEADER, RECORD, Autosave, SaveState
+
+
+def new_game(directory):
+    givens = bytes([1, 0, 0] + [0] * 78)
+    digits = bytes([5, 0, 0] + [0] * 78)
+    autosave = Autosave(directory)
+    autosave.start(SaveState("Medium", givens, digits, (0,) * 81, 12.5, 0))
+    return autosave
+
+
+def test_torn_record_is_ignored(tmp_path):
+    autosave = new_game(tmp_path)
+    autosave.record(1, 3, 14.0)
+    autosave.record_notes(2, 0b101, 15.0)
+    autosave.record(1, 4, 16.5)
+    # A crash halfway through writing the next record
+    autosave.journal.write(RECORD.pack(7, 0, 9, 18.0)[:5])
+    autosave.journal.flush()
+
+    state = Autosave(tmp_path).load()
+    assert state.digits[:3] == bytes([5, 4, 0])
+    assert state.digits[7] == 0
+    assert state.notes[2] == 0b101
+    assert state.moves == 2
+    assert state.elapsed == pytest.approx(16.5)
+
+
+def test_journal_of_another_generation_is_skipped(tmp_path):
+    autosave = new_game(tmp_path)
+    autosave.record(1, 3, 14.0)
+    stale = autosave.journal_path.read_bytes()
+    # The snapshot already holds the move; a crash before the journal was
+    # replaced leaves the old journal behind, which must not replay it again
+    autosave.compact(14.0)
+    autosave.journal.close()
+    autosave.journal_path.write_bytes(stale)
+
+    state = Autosave(tmp_path).load()
+    assert state.digits[1] == 3
+    assert state.moves == 1
+
+
+def test_journal_is_compacted(tmp_path):
+    autosave = new_game(tmp_path)
+    generation = autosave.generation
+    digits = bytearray(autosave.state.digits)
+    for move in range(COMPACT_EVERY + 3):
+        cell, digit = 1 + move % 80, move % 9 + 1
+        autosave.record(cell, digit, 20.0 + move)
+        digits[cell] = digit
+
+    assert autosave.generation == generation + 1
+    assert autosave.journal_path.stat().st_size == JOURNAL_HEADER.size + 3 * RECORD.size
+    state = Autosave(tmp_path).load()
+    assert state.moves == COMPACT_EVERY + 3
+    assert state.digits == digits
+    assert state.elapsed == pytest.approx(20.0 + COMPACT_EVERY + 2)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from time import time
+from typing import Callable
+
+from textual.app import App
+from textual.timer import Timer
+
+# Fire a little after the second boundary so the clock has rolled over.
+SLACK = 0.005
+
+
+class Ticker:
+    """One timer for the whole app, firing just after every wall-clock second.
+
+    Widgets subscribe while they are shown and unsubscribe when hidden. With
+    no subscribers, or while the terminal does not have focus, no timer is
+    armed at all; regaining focus ticks once straight away to catch up.
+    """
+
+    def __init__(self, app: App) -> None:
+        self.app = app
+        self.subscribers: dict[object, Callable[[], None]] = {}
+        self.timer: Timer | None = None
+        self.ticks = 0
+        app.watch(app, "app_focus", self._focus_changed, init=False)
+
+    def subscribe(self, owner: object, callback: Callable[[], None]) -> None:
+        self.subscribers[owner] = callback
+        self._arm()
+
+    def unsubscribe(self, owner: object) -> None:
+        self.subscribers.pop(owner, None)
+        if not self.subscribers:
+            self._disarm()
+
+    def _arm(self) -> None:
+        if self.timer is None and self.subscribers and self.app.app_focus:
+            self.timer = self.app.set_timer(1 - time() % 1 + SLACK, self._tick, name="tick")
+
+    def _disarm(self) -> None:
+        if self.timer is not None:
+            self.timer.stop()
+            self.timer = None
+
+    def _tick(self) -> None:
+        self.timer = None
+        self.ticks += 1
+        for callback in list(self.subscribers.values()):
+            callback()
+        self._arm()
+
+    def _focus_changed(self, focus: bool) -> None:
+        if focus:
+            self._disarm()
+            self._tick()
+        else:
+            self._disarm()
+
+
+def ticker(app: App) -> Ticker:
+    # Kept on the app itself: a registry keyed by app would keep every app
+    # alive through the ticker's reference back to it
+    try:
+        return app.ticker
+    except AttributeError:
+        app.ticker = Ticker(app)
+        return app.ticker
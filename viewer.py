@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from time import monotonic
+
+from textual.app import App, ComposeResult
+from textual.containers import Center, Vertical
+from textual.events import Key
+from textual.widgets import Static
+
+from board import Board
+from grid import SudokuGrid3X3
+from replay import Frame, Replay, latest
+
+
+class ReplayViewer(Vertical, can_focus=True):
+    """Plays a recorded game back on a read-only grid.
+
+    space plays and pauses, +/- change the speed, left/right jump ten seconds
+    and home/end go to either end. Every jump is a keyframe seek.
+    """
+
+    DEFAULT_CSS = """
+        ReplayViewer {
+            width: auto;
+            height: auto;
+
+            #replay-status {
+                width: auto;
+                color: #0F0;
+            }
+        }
+    """
+
+    SPEEDS = (0.5, 1, 2, 4, 8, 16, 32)
+    FPS = 30
+    JUMP_MS = 10_000
+
+    def __init__(self, replay: Replay) -> None:
+        super().__init__()
+        self.replay = replay
+        self.grid = SudokuGrid3X3(board=Board(replay.start, replay.givens))
+        self.grid.can_focus = False
+        self.grid.finished = True
+        self.status = Static(id='replay-status')
+        self.speed = 1
+        self.playing = False
+        self.clock = 0.0
+        self.position = 0
+
+    def compose(self) -> ComposeResult:
+        yield self.grid
+        yield Center(self.status)
+
+    def on_mount(self) -> None:
+        self.ticked = monotonic()
+        self.set_interval(1 / self.FPS, self.tick)
+        self.show(self.replay.frame(0))
+
+    def tick(self) -> None:
+        now = monotonic()
+        if self.playing:
+            self.clock = min(self.clock + (now - self.ticked) * 1000 * self.speed, self.replay.duration)
+            if self.clock >= self.replay.duration:
+                self.playing = False
+            self.seek(self.clock)
+        self.ticked = now
+
+    def seek(self, ms: float) -> None:
+        self.clock = max(0.0, min(ms, self.replay.duration))
+        position = self.replay.position_at(self.clock)
+        if position != self.position:
+            self.show(self.replay.frame(position))
+        else:
+            self.update_status(self.replay.frame(position).paused)
+
+    def show(self, frame: Frame) -> None:
+        grid, board = self.grid, self.grid.board
+        self.position = frame.position
+        with self.app.batch_update():
+            for index, digit in enumerate(frame.digits):
+                if board.digits[index] != digit:
+                    for cell in board.place(index, digit):
+                        grid.flat_cells[cell].set_class(bool(board.errors[cell]), 'error')
+                    grid.flat_cells[index].digit = digit or None
+            if frame.selected is None:
+                grid.clear_selection()
+            elif grid.selected_cell is not grid.flat_cells[frame.selected]:
+                grid.select_cell(grid.flat_cells[frame.selected])
+        self.update_status(frame.paused)
+
+    def update_status(self, paused: bool) -> None:
+        def clock(ms: float) -> str:
+            minutes, seconds = divmod(int(ms / 1000), 60)
+            return f"{minutes:02}:{seconds:02}"
+
+        state = "▶" if self.playing else "⏸"
+        timer = "  timer paused" if paused else ""
+        self.status.update(
+            f"{state} {self.speed:g}×  {clock(self.clock)} / {clock(self.replay.duration)}"
+            f"  event {self.position}/{len(self.replay)}{timer}"
+        )
+
+    def on_key(self, event: Key) -> None:
+        speeds = self.SPEEDS
+        match event.key:
+            case 'space':
+                if self.clock >= self.replay.duration:
+                    self.clock = 0.0
+                self.playing = not self.playing
+            case 'plus':
+                self.speed = speeds[min(speeds.index(self.speed) + 1, len(speeds) - 1)]
+            case 'minus':
+                self.speed = speeds[max(speeds.index(self.speed) - 1, 0)]
+            case 'left':
+                self.seek(self.clock - self.JUMP_MS)
+            case 'right':
+                self.seek(self.clock + self.JUMP_MS)
+            case 'home':
+                self.seek(0)
+            case 'end':
+                self.seek(self.replay.duration)
+            case _:
+                return
+        event.stop()
+        self.update_status(self.replay.frame(self.position).paused)
+
+
+class ViewerApp(App):
+
+    CSS_PATH = "test.tcss"
+
+    def __init__(self, replay: Replay) -> None:
+        super().__init__()
+        self.replay = replay
+
+    def compose(self) -> ComposeResult:
+        yield ReplayViewer(self.replay)
+
+    def on_mount(self) -> None:
+        self.query_one(ReplayViewer).focus()
+
+
+if __name__ == "__main__":
+    # python viewer.py [FILE]: the latest recorded game by default
+    path = Path(sys.argv[1]) if sys.argv[1:] else latest()
+    if path is None:
+        sys.exit("no replays recorded yet")
+    ViewerApp(Replay.load(path)).run()
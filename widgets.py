@@ -1,13 +1,10 @@
 from __future__ import annotations
 
-from textual.containers import Center, Grid
+from textual.containers import Center
 from textual.widgets import Static, Digits
 from textual.message import Message
 from textual.reactive import var
-from textual.timer import Timer
-from textual.app import ComposeResult, App
-from textual import work
-from textual.events import Key
+from textual.app import ComposeResult
 
 from datetime import datetime
 
@@ -15,7 +12,7 @@ from typing import Optional
 
 from time import monotonic
 
-from sudoku import Sudoku
+from tick import ticker
 
 class CenteredButton(Center):
 
@@ -75,12 +72,27 @@ class DigitalClock(Static):
     }
     """
 
+    shown = ""
+
     def update_time(self) -> None:
-        self.update(datetime.now().strftime("%H:%M:%S"))
+        text = datetime.now().strftime("%H:%M:%S")
+        # Only repaint when the text actually changes
+        if text != self.shown:
+            self.shown = text
+            self.update(text)
 
     def on_mount(self) -> None:
         self.update_time()
-        self.set_interval(1, self.update_time)
+
+    def on_show(self) -> None:
+        self.update_time()
+        ticker(self.app).subscribe(self, self.update_time)
+
+    def on_hide(self) -> None:
+        ticker(self.app).unsubscribe(self)
+
+    def on_unmount(self) -> None:
+        ticker(self.app).unsubscribe(self)
 
 class CustomTimer(Digits):
 
@@ -99,6 +111,8 @@ class CustomTimer(Digits):
     start_time: Optional[float] = None
     total_time: float = 0.0
     pause: var[bool] = var(True, init=False)
+    shown = ""
+    on_screen = False
 
     def spended_time(self) -> float:
         if self.start_time is None:
@@ -108,19 +122,36 @@ class CustomTimer(Digits):
     def update_display(self) -> None:
         minutes, seconds = divmod(self.spended_time(), 60)
         hours, minutes = divmod(minutes, 60)
-        self.update(f"{int(hours):02}:{int(minutes):02}:{int(seconds):02}")
+        text = f"{int(hours):02}:{int(minutes):02}:{int(seconds):02}"
+        if text != self.shown:
+            self.shown = text
+            self.update(text)
 
 
     def on_mount(self) -> None:
         self.update_display()
-        self.timer: Timer = self.set_interval(1, self.update_display, pause=self.pause)
+
+    def on_show(self) -> None:
+        self.on_screen = True
+        self.update_ticking()
+
+    def on_hide(self) -> None:
+        self.on_screen = False
+        self.update_ticking()
+
+    def on_unmount(self) -> None:
+        ticker(self.app).unsubscribe(self)
 
     def watch_pause(self) -> None:
-        #self.app.notify("Inside Watch")
-        if self.pause:
-            self.timer.pause()
+        self.update_ticking()
+
+    def update_ticking(self) -> None:
+        # Ticks only while running and visible
+        if self.on_screen and not self.pause:
+            self.update_display()
+            ticker(self.app).subscribe(self, self.update_display)
         else:
-            self.timer.resume()
+            ticker(self.app).unsubscribe(self)
         
 
     def start_timer(self) -> None:
@@ -172,234 +203,66 @@ class SimpleCounter(Static):
         self.value += 1
         self.counter_display.update(str(self.value))
 
-class Cell(Static):
-
-    DEFAULT_CSS = """
-        Cell {
-            height: 1;
-            width: 3;
-            text-align: center;
-            color: #0F0;
-
-            &.selected {
-                background: $surface-lighten-3; 
-            }
-
-            &.neighbour {
-                background: $success-lighten-3 10%; 
-            }
-
-            &.built-in {
-                color: white 50%;
-                text-style: italic;
-            }
-            &.error {
-                color: red;
-            }
-        }
+class PerfOverlay(Static):
+    """Live handler latencies, frame rate and message queue depth.
 
+    Showing it turns the probes on; hiding it turns them off again, so the
+    hot paths only pay for timing while someone is looking.
     """
 
-    class Clicked(Message):
-        def __init__(self, cell):
-            self.cell = cell
-            super().__init__()
-
-    selected: var[bool] = var(False, init=False)
-    digit: var[int] = var(0, init=False)
-
-    def __init__(self, digit: int | None, row_index: int, col_index: int) -> None:
-        super().__init__()
-        self.row: int = row_index
-        self.col: int = col_index
-        self.digit = digit
-        if self.digit:
-            self.add_class('built-in')
-
-    def on_click(self) -> None:
-        self.post_message(self.Clicked(self))
-
-    def watch_digit(self):
-        if self.digit:
-            self.update(str(self.digit))
-        else:
-            self.update('')
-
-    def watch_selected(self):
-        # self.app.notify(str(self.selected))
-        if self.selected and not self.has_class('selected'):
-            self.add_class('selected')
-        else:
-            if self.has_class('selected'):
-                self.remove_class('selected')
-
-    def __str__(self):
-        return f"({self.row}, {self.col})"
-
-class SudokuGrid3X3(Grid, can_focus=True):
-
     DEFAULT_CSS = """
-        SudokuGrid3X3 {
-            box-sizing: content-box;
-            grid-size: 9;
-            width: 40;
-            height: 23;
-            padding-top: 2;
-            padding-left: 1;
-            keyline: thin $success-darken-3;
-            background: $success-lighten-3 15%;
-            grid-gutter: 0 1;
-        }
-
-        SudokuGrid3X3:focus {
-            border: vkey green;
+        PerfOverlay {
+            dock: top;
+            display: none;
+            width: auto;
+            padding: 0 1;
+            color: #0F0;
+            background: $surface 80%;
+            border: round $success-darken-3;
+            border-title-align: left;
         }
-
     """
 
-    def __init__(self) -> None:
-        self.puzzle = Sudoku(3).difficulty(0.5).board
-        super().__init__()
-
-    def compose(self) -> ComposeResult:
-        self.cells = [
-            [Cell(digit, row_in, col_in) for col_in, digit in enumerate(row)]
-            for row_in, row in enumerate(self.puzzle)
-            # [Cell(str((row * 9 + col) % 10), row, col) for col in range(9)]
-            # for row in range(9)
-        ]
-        for row in self.cells:
-            yield from row
-
-    # def on_blur(self) -> None:
-    #     if self.selected_cell:
-    #         self.selected_cell.selected = False
-    #         self.selected_cell = None
+    BORDER_TITLE = "PERF"
 
-    def on_mount(self) -> None:
-        # To track the currently selected cell
-        self.selected_cell = None
+    # Seconds between refreshes
+    INTERVAL = 0.5
 
-    def select_cell(self, cell) -> None:
-        cell.selected = True
-        self.selected_cell = cell
+    def toggle(self) -> None:
+        import probe
 
-    def select_neighbours(self):
-        prev_neighbour_cells = set(self.query_children('.neighbour'))
-        curr_neighbour_cells = set(self.neighbour_cells())
-        
-        # Remove the class from cells that are no longer neighbors
-        for cell in (prev_neighbour_cells - curr_neighbour_cells):
-            cell.remove_class('neighbour')
-
-        # Add the class to new neighbor cells
-        for cell in (curr_neighbour_cells - prev_neighbour_cells):
-            cell.add_class('neighbour')
-
-
-    def neighbour_cells(self, cell: Cell = None):
-        if cell is None:
-            cell = self.selected_cell
-
-        row = cell.row // 3 * 3
-        col = cell.col // 3 * 3
-        return [
-                self.cells[i][j]
-                for i in range(row, row + 3)
-                for j in range(col, col + 3)
-                if (i , j) != (cell.row, cell.col)
-            ] + [
-                self.cells[cell.row][j]
-                for j in range(9)
-                if j // 3 * 3 != col
-            ] + [
-                self.cells[i][cell.col]
-                for i in range(9)
-                if i // 3 * 3 != row
-            ]
-    def has_conflict_cells(self, Cell):
-        for cell in self.neighbour_cells(Cell):
-            if Cell.digit == cell.digit:
-                return True
-        
-        return False
-    	
-    def check_neighbours(self):
-        if self.selected_cell.digit:
-            for cell in self.neighbour_cells():
-                if self.selected_cell.digit == cell.digit:
-                    if not cell.has_class('error'):
-                        cell.add_class('error')
-                    if not self.selected_cell.has_class('error'):
-                        self.selected_cell.add_class('error')
-                else:
-                    if cell.has_class('error') and not self.has_conflict_cells(cell):
-                        cell.remove_class('error')
+        self.display = not self.display
+        if self.display:
+            probe.enable()
+            self.frames, self.since = 0, monotonic()
+            self.refresher = self.set_interval(self.INTERVAL, self.refresh_stats)
         else:
-            ... 
-
-    def on_cell_clicked(self, event: Cell.Clicked) -> None:
-        clicked_cell = event.cell
-
-        # Reset the previous selected cell's background if any
-        if self.selected_cell and self.selected_cell != clicked_cell:
-            self.selected_cell.selected = False
-
-        # Set the new selected cell's background
-        self.select_cell(clicked_cell)
-        self.select_neighbours()
-            
-                
-    async def on_key(self, event: Key) -> None:
-        if self.selected_cell:
-            if event.key.isdecimal() or event.key == 'backspace':
-                if self.selected_cell.has_class('built-in'):
-                    self.app.notify("This Cell Can not be Modified!")
-                else:
-                    match event.key:
-                        case '0':
-                            self.app.notify('0 is not a valid input!')
-                        case 'backspace':
-                            self.selected_cell.digit = None
-                        case _:
-                            self.selected_cell.digit = int(event.key)
-                            self.check_neighbours()
-            else:
-                new_row, new_col = self.selected_cell.row, self.selected_cell.col
-                match event.key:
-                    case "up":
-                        new_row -= 1
-                    case "down":
-                        new_row += 1
-                    case "left":
-                        new_col -= 1
-                    case "right":
-                        new_col += 1
-                    case _:
-                        pass
-                
-                self.move_selection(new_row, new_col) 
-               
-            
-
-    @work(exclusive=True)
-    async def move_selection(self, row: int, col: int) -> None:
-        # Deselect the current cell
-        if self.selected_cell:
-            self.selected_cell.selected = False
-
-        # Update the selected cell coordinates
-        row, col = row % 9, col % 9
-        self.selected_cell = self.cells[row][col]
-        self.selected_cell.selected = True
-        self.select_neighbours()
-
-class MyApp(App):
-
-    CSS_PATH = "test.tcss"
-
-    def compose(self):
-        yield SudokuGrid3X3()
-
-if __name__ == "__main__": MyApp().run()
-
+            self.refresher.stop()
+            probe.disable()
+
+    def refresh_stats(self) -> None:
+        import probe
+
+        now = monotonic()
+        frames = probe.histograms[probe.FRAME].count
+        fps = (frames - self.frames) / (now - self.since)
+        self.frames, self.since = frames, now
+        focused = self.app.focused
+        lines = [
+            f"{name:<32} {histogram.percentile(50) * 1000:7.2f} {histogram.percentile(99) * 1000:7.2f}"
+            for name, histogram in sorted(probe.histograms.items())
+            if histogram.count and name != probe.FRAME
+        ]
+        lines.insert(0, f"{'ms':<32} {'p50':>7} {'p99':>7}")
+        lines.append(
+            f"fps {fps:5.1f}   queue app {self.app.message_queue_size}"
+            f" focused {focused.message_queue_size if focused else 0}"
+        )
+        pool = getattr(self.app, "pool", None)
+        if pool is not None:
+            first = pool.time_to_first_board
+            lines.append(
+                f"pool hits {pool.hits} misses {pool.misses}"
+                f" first board {'-' if first is None else f'{first * 1000:.1f} ms'}"
+            )
+        self.update("\n".join(lines))